@@ -0,0 +1,68 @@
+"""
+Throughput and accuracy of the fp32, int8 and ONNX Runtime backends.
+
+Transcribes the same audio with each backend on CPU and reports
+audio-seconds per wall-second, the speedup over fp32 and, when the fixture
+clips are present (see fixtures/README.md), the WER change against fp32.
+Run from the audio-service directory (loads ./whisper-tiny):
+
+    python -m benchmarks.bench_backends --seconds 120
+"""
+import argparse
+import time
+
+import torch
+
+from benchmarks.bench_batching import MODEL, synthetic_audio
+from service.fixtures import load_fixtures
+from service.inference import SAMPLING_RATE
+from service.model import BACKENDS, load_pipeline
+from service.wer import wer
+
+GENERATE_KWARGS = {"language": "en", "task": "transcribe", "max_new_tokens": 64}
+
+
+def transcribe(pipeline, audio) -> str:
+    return pipeline({"raw": audio, "sampling_rate": SAMPLING_RATE})["text"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=120, help="synthetic audio length for throughput")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 = torch default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    audio = synthetic_audio(args.seconds, seed=0)
+    fixtures = load_fixtures()
+
+    print(f"{args.seconds}s audio, {len(fixtures)} fixture clips, {torch.get_num_threads()} threads")
+    print(f"{'backend':>8} {'wall (s)':>10} {'audio-s / wall-s':>18} {'speedup':>8} {'WER':>6} {'dWER':>6}")
+    baseline = None
+    for backend in args.backends.split(","):
+        try:
+            pipeline = load_pipeline(MODEL, GENERATE_KWARGS, backend)
+        except RuntimeError as e:
+            print(f"{backend:>8} skipped: {e}")
+            continue
+
+        # Warm-up so the first measured run doesn't pay for lazy initialisation
+        transcribe(pipeline, audio[:SAMPLING_RATE])
+        start = time.perf_counter()
+        transcribe(pipeline, audio)
+        wall = time.perf_counter() - start
+
+        error = (
+            sum(wer(ref.lower(), transcribe(pipeline, clip).lower()) for clip, ref in fixtures) / len(fixtures)
+            if fixtures else float("nan")
+        )
+        if baseline is None:
+            baseline = (wall, error)
+        print(f"{backend:>8} {wall:>10.2f} {args.seconds / wall:>18.1f} {baseline[0] / wall:>7.2f}x"
+              f" {error:>6.3f} {error - baseline[1]:>+6.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Throughput of the batched inference worker at different max batch sizes.
+
+Sends several concurrent transcription requests through BatchedTranscriber
+and reports audio-seconds transcribed per wall-second. Run from the
+audio-service directory (loads ./whisper-tiny):
+
+    python -m benchmarks.bench_batching --requests 8 --seconds 60
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import transformers
+
+from service.inference import SAMPLING_RATE, BatchedTranscriber
+
+MODEL = "./whisper-tiny"
+
+
+def synthetic_audio(seconds: int, seed: int) -> np.ndarray:
+    """
+    Speech-band tones with a slow amplitude envelope plus a little noise.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(seconds * SAMPLING_RATE) / SAMPLING_RATE
+    tones = sum(np.sin(2 * np.pi * f * t) for f in rng.uniform(150, 900, size=3))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 0.5 * t)
+    audio = 0.1 * tones * envelope + 0.01 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+async def run(pipeline, batch_size: int, clips) -> float:
+    transcriber = BatchedTranscriber(pipeline, max_batch_size=batch_size, max_wait_ms=50)
+    await transcriber.start()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(transcriber.transcribe(clip) for clip in clips))
+        return time.perf_counter() - start
+    finally:
+        await transcriber.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--seconds", type=int, default=60, help="audio length per request")
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    args = parser.parse_args()
+
+    pipeline = transformers.pipeline(
+        task="automatic-speech-recognition",
+        model=MODEL,
+        tokenizer=MODEL,
+        chunk_length_s=30,
+        device=-1,
+        generate_kwargs={"language": "en", "task": "transcribe", "max_new_tokens": 64},
+    )
+    clips = [synthetic_audio(args.seconds, seed) for seed in range(args.requests)]
+    audio_seconds = args.requests * args.seconds
+
+    # Warm-up so the first measured run doesn't pay for lazy initialisation
+    asyncio.run(run(pipeline, 1, clips[:1]))
+
+    print(f"{args.requests} concurrent requests x {args.seconds}s audio")
+    print(f"{'batch':>5} {'wall (s)':>10} {'audio-s / wall-s':>18}")
+    for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+        wall = asyncio.run(run(pipeline, batch_size, clips))
+        print(f"{batch_size:>5} {wall:>10.2f} {audio_seconds / wall:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
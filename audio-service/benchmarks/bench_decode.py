@@ -0,0 +1,89 @@
+"""
+Audio extraction before/after: temp .mp3 round trip vs. piping PCM from ffmpeg.
+
+Generates a test clip (testsrc video + sine tone) and times both ways of
+getting 16 kHz mono float32 PCM out of it. Run from the audio-service
+directory (ffmpeg must be on PATH):
+
+    python -m benchmarks.bench_decode --seconds 300 --repeat 3
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from service.decoding import decode_pcm
+from service.inference import SAMPLING_RATE
+
+
+def make_test_clip(path: str, seconds: int):
+    subprocess.check_call([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=duration={seconds}:size=640x360:rate=25",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}:sample_rate=44100",
+        "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest",
+        path,
+    ])
+
+
+def mp3_round_trip(video_path: str) -> tuple:
+    """
+    The old path: transcode to a temp .mp3, then decode that .mp3 again
+    (what the pipeline's ffmpeg_read did). Returns (pcm, bytes written to disk).
+    """
+    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
+        mp3_path = tmp.name
+    try:
+        subprocess.check_call(["ffmpeg", "-y", "-loglevel", "error", "-i", video_path, mp3_path])
+        written = os.path.getsize(mp3_path)
+        with open(mp3_path, "rb") as f:
+            mp3_bytes = f.read()
+        out = subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-ac", "1", "-ar", str(SAMPLING_RATE),
+             "-f", "f32le", "pipe:1"],
+            input=mp3_bytes, capture_output=True, check=True,
+        ).stdout
+        return np.frombuffer(out, dtype=np.float32), written
+    finally:
+        os.remove(mp3_path)
+
+
+def direct_pipe(video_path: str) -> tuple:
+    return asyncio.run(decode_pcm(video_path)), 0
+
+
+def measure(fn, video_path: str, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pcm, written = fn(video_path)
+        times.append(time.perf_counter() - start)
+    return min(times), written, len(pcm) / SAMPLING_RATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=300, help="clip length")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        clip = os.path.join(workdir, "clip.mp4")
+        make_test_clip(clip, args.seconds)
+        results = {
+            "mp3 round trip": measure(mp3_round_trip, clip, args.repeat),
+            "direct pipe": measure(direct_pipe, clip, args.repeat),
+        }
+
+    print(f"test clip: {args.seconds}s testsrc + 440 Hz sine")
+    print(f"{'path':<15} {'wall (s)':>9} {'disk written':>13} {'audio (s)':>10}")
+    for name, (wall, written, decoded) in results.items():
+        print(f"{name:<15} {wall:>9.3f} {written / 1e6:>10.2f} MB {decoded:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Speedup of parallel chunked transcription against the number of cores used.
+
+Transcribes one long synthetic clip with ParallelTranscriber at increasing
+worker counts and reports wall time and speedup over a single worker. Run
+from the audio-service directory (loads ./whisper-tiny):
+
+    python -m benchmarks.bench_parallel --seconds 600
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_batching import MODEL, synthetic_audio
+from service.parallel import ParallelTranscriber, available_cpus
+
+GENERATE_KWARGS = {"language": "en", "task": "transcribe", "max_new_tokens": 64}
+
+
+async def run(workers: int, audio) -> float:
+    transcriber = ParallelTranscriber(MODEL, GENERATE_KWARGS, workers=workers)
+    try:
+        # Warm-up: load the model in every worker before timing
+        await asyncio.gather(*(transcriber.transcribe(audio[:16000]) for _ in range(workers)))
+        start = time.perf_counter()
+        await transcriber.transcribe(audio)
+        return time.perf_counter() - start
+    finally:
+        await transcriber.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=600, help="clip length")
+    args = parser.parse_args()
+
+    audio = synthetic_audio(args.seconds, seed=0)
+    cores = available_cpus()
+    counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    print(f"{args.seconds}s synthetic audio, {cores} cores available")
+    print(f"{'workers':>7} {'wall (s)':>10} {'speedup':>8}")
+    baseline = None
+    for workers in counts:
+        wall = asyncio.run(run(workers, audio))
+        baseline = baseline or wall
+        print(f"{workers:>7} {wall:>10.2f} {baseline / wall:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+def cache_key(audio: np.ndarray, **params) -> str:
+    """
+    SHA-256 of the decoded PCM plus everything that changes the output
+    (model, generation parameters, ...).
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _normalize(transcription: List[dict]) -> List[dict]:
+    """
+    Round-trip through JSON so both tiers return the same shapes
+    (timestamps as lists, as Mongo stores them).
+    """
+    return json.loads(json.dumps(transcription))
+
+
+class TranscriptionCache:
+    """
+    Two-tier transcription cache.
+
+    The local tier is an in-process LRU bounded by the total JSON size of
+    the cached transcriptions (max_bytes). The persistent tier is a Mongo
+    collection keyed by the cache key, shared by every replica and surviving
+    restarts. Mongo errors are logged and treated as misses.
+    """
+
+    def __init__(self, collection, max_bytes: int):
+        self.collection = collection
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (transcription, size)
+        self._size = 0
+        self.hits = {"local": 0, "mongo": 0}
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[List[dict]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits["local"] += 1
+            return entry[0]
+
+        doc = None
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"_id": key})
+            except Exception:
+                logging.exception("Transcription cache lookup failed")
+        if doc is not None:
+            self.hits["mongo"] += 1
+            self._put_local(key, doc["transcription"])
+            return doc["transcription"]
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, transcription: List[dict]):
+        transcription = _normalize(transcription)
+        self._put_local(key, transcription)
+        if self.collection is not None:
+            try:
+                await self.collection.replace_one(
+                    {"_id": key}, {"_id": key, "transcription": transcription}, upsert=True
+                )
+            except Exception:
+                logging.exception("Transcription cache store failed")
+
+    def _put_local(self, key: str, transcription: List[dict]):
+        size = len(json.dumps(transcription))
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old[1]
+        self._entries[key] = (transcription, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def stats(self) -> dict:
+        return {
+            "hits_local": self.hits["local"],
+            "hits_mongo": self.hits["mongo"],
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
@@ -0,0 +1,42 @@
+import asyncio
+
+import numpy as np
+
+from .inference import SAMPLING_RATE
+
+
+class DecodeError(Exception):
+    """Raised when ffmpeg can't extract an audio track."""
+
+
+def pcm_args(path: str, sampling_rate: int = SAMPLING_RATE) -> list:
+    """
+    ffmpeg args that write the audio track of `path` to stdout as mono
+    float32 PCM at `sampling_rate`, the format Whisper consumes.
+    """
+    return [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sampling_rate),
+        "-f", "f32le",
+        "pipe:1",
+    ]
+
+
+async def decode_pcm(path: str, sampling_rate: int = SAMPLING_RATE) -> np.ndarray:
+    """
+    Decode the audio of a media file straight into a NumPy array, without an
+    intermediate audio file. Runs ffmpeg as an async subprocess so the event
+    loop isn't blocked while it works.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *pcm_args(path, sampling_rate),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise DecodeError(stderr.decode("utf-8", errors="replace").strip())
+    return np.frombuffer(stdout, dtype=np.float32)
@@ -0,0 +1,32 @@
+import asyncio
+import json
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from .decoding import decode_pcm
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+
+def load_fixtures() -> List[Tuple[np.ndarray, str]]:
+    """
+    (16 kHz PCM, reference transcript) for every fixture clip present on disk.
+    """
+    with open(os.path.join(FIXTURES_DIR, "references.json")) as f:
+        references = json.load(f)
+    clips = []
+    for name, reference in references.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        if os.path.exists(path):
+            clips.append((asyncio.run(decode_pcm(path)), reference))
+    return clips
+
+
+def weights_present(model: str) -> bool:
+    """
+    False when the checkpoint is still a Git LFS pointer (not pulled).
+    """
+    path = os.path.join(model, "model.safetensors")
+    return os.path.exists(path) and os.path.getsize(path) > 1024
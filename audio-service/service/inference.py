@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from .stitching import overlapping_windows, stitch
+
+SAMPLING_RATE = 16000
+WINDOW_SECONDS = 30  # Whisper's native input length
+OVERLAP_SECONDS = 5  # shared by consecutive windows, so no word is cut in half
+
+
+@dataclass
+class _Window:
+    audio: np.ndarray
+    future: asyncio.Future
+
+
+class BatchedTranscriber:
+    """
+    Runs the ASR pipeline on one dedicated inference thread, so the event
+    loop stays free to serve requests and health checks.
+
+    Requests are cut into 30 second windows, overlapping by 5 seconds, and
+    put on an asyncio queue.
+    The worker takes the first waiting window, then keeps collecting windows
+    (from any request) until it has max_batch_size of them or max_wait_ms has
+    passed, and runs the whole batch through the model in one forward pass.
+    A request's windows are stitched back together once all are done.
+    """
+
+    def __init__(self, pipeline, max_batch_size: int = 8, max_wait_ms: int = 50,
+                 window_s: float = WINDOW_SECONDS, overlap_s: float = OVERLAP_SECONDS):
+        self.pipeline = pipeline
+        self.window_s = window_s
+        self.overlap_s = overlap_s
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr")
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def transcribe(self, audio: np.ndarray) -> List[dict]:
+        """
+        Transcribe 16 kHz mono float32 PCM and return timestamped chunks on
+        the original timeline.
+        """
+        loop = asyncio.get_running_loop()
+        ranges = overlapping_windows(len(audio), SAMPLING_RATE, self.window_s, self.overlap_s)
+        futures = []
+        for start, end in ranges:
+            future = loop.create_future()
+            await self._queue.put(_Window(audio[start:end], future))
+            futures.append(future)
+
+        results = await asyncio.gather(*futures)
+        return stitch([
+            (start / SAMPLING_RATE, (end - start) / SAMPLING_RATE, chunks)
+            for (start, end), chunks in zip(ranges, results)
+        ])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                outputs = await loop.run_in_executor(self._executor, self._infer, [w.audio for w in batch])
+            except Exception as e:
+                for window in batch:
+                    if not window.future.done():
+                        window.future.set_exception(e)
+                continue
+
+            for window, output in zip(batch, outputs):
+                if not window.future.done():
+                    window.future.set_result(output.get("chunks", []))
+
+    def _infer(self, windows: List[np.ndarray]) -> List[dict]:
+        inputs = [{"raw": w, "sampling_rate": SAMPLING_RATE} for w in windows]
+        return self.pipeline(inputs, batch_size=len(inputs), return_timestamps=True)
@@ -1,43 +1,64 @@
 import asyncio
-from io import BytesIO
 import os
-import subprocess
-import tempfile
 
-from bson import ObjectId
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
-import transformers
-import torch
+
+from .cache import TranscriptionCache, cache_key
+from .decoding import DecodeError, decode_pcm
+from .gridfs_io import download_to_file
+from .inference import OVERLAP_SECONDS, SAMPLING_RATE, WINDOW_SECONDS, BatchedTranscriber
+from .model import load_pipeline
+from .parallel import ParallelTranscriber
+from .vad import compact, find_speech_segments, remap_chunks
 
 app = FastAPI()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-TASK = "automatic-speech-recognition"
 MODEL = "./whisper-tiny"  # e.g., "openai/whisper-tiny.en"
-
-# Since you said "I don't have GPU", we set device=-1 (CPU).
-# We'll still pass torch_dtype=float16, but if it fails, we fallback to normal pipeline.
-try:
-    pipeline = transformers.pipeline(
-        task=TASK,
-        model=MODEL,
-        tokenizer=MODEL,
-        chunk_length_s=30,
-        device=-1,  # CPU
-        torch_dtype=torch.float16,  # half precision for speed, but might error if not supported
-        generate_kwargs={"language": "en", "task": "transcribe"},  # force English
-    )
-except Exception:
-    # Fallback: no half precision
-    pipeline = transformers.pipeline(
-        task=TASK,
-        model=MODEL,
-        tokenizer=MODEL,
-        chunk_length_s=30,
-        device=-1,  # CPU
-        generate_kwargs={"language": "en", "task": "transcribe"},
+# Inference backend: "fp32", "int8" (dynamic quantization) or "onnx" (ONNX Runtime)
+ASR_BACKEND = os.getenv("ASR_BACKEND", "fp32")
+ONNX_MODEL_DIR = os.getenv("ASR_ONNX_MODEL_DIR") or None  # default: <MODEL>/onnx
+# "batched": one model, windows from concurrent requests batched together
+# "parallel": overlapping windows of each request spread over all cores
+ASR_MODE = os.getenv("ASR_MODE", "batched")
+PARALLEL_WORKERS = int(os.getenv("ASR_PARALLEL_WORKERS", "0"))  # 0 = one per available core
+# Micro-batching of overlapping 30 s windows across concurrent requests
+MAX_BATCH_SIZE = int(os.getenv("ASR_MAX_BATCH_SIZE", "8"))
+MAX_WAIT_MS = int(os.getenv("ASR_MAX_WAIT_MS", "50"))
+# Size bound of the in-process tier of the transcription cache
+CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+GENERATE_KWARGS = {"language": "en", "task": "transcribe"}  # force English
+# Energy-based VAD pre-pass: only speech segments are sent to Whisper
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+
+if ASR_MODE == "parallel":
+    # Overlapping windows transcribed across a process pool (one model per core)
+    transcriber = ParallelTranscriber(
+        MODEL, GENERATE_KWARGS, workers=PARALLEL_WORKERS, backend=ASR_BACKEND, onnx_dir=ONNX_MODEL_DIR
     )
+else:
+    # The model is loaded once; all inference goes through this batching worker
+    pipeline = load_pipeline(MODEL, GENERATE_KWARGS, ASR_BACKEND, ONNX_MODEL_DIR)
+    transcriber = BatchedTranscriber(pipeline, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS)
+
+transcription_cache: TranscriptionCache | None = None
+vad_seconds = {"total": 0.0, "skipped": 0.0}  # audio seen / skipped by the VAD
+
+
+@app.on_event("startup")
+async def startup_event():
+    global transcription_cache
+    client, _ = await get_mongo_client()
+    transcription_cache = TranscriptionCache(client.video_status.transcription_cache, CACHE_MAX_BYTES)
+    await transcriber.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await transcriber.stop()
 
 
 async def get_mongo_client():
@@ -46,15 +67,12 @@ async def get_mongo_client():
     return client, grid_fs_bucket
 
 
-async def get_audio(video_id: str) -> BytesIO:
+async def get_audio(video_id: str) -> str:
     """
-    Download the video from GridFS into a BytesIO object.
+    Stream the video from GridFS to a temp .mp4 file and return its path.
     """
     _, grid_fs_bucket = await get_mongo_client()
-    output_stream = BytesIO()
-    await grid_fs_bucket.download_to_stream(ObjectId(video_id), output_stream)
-    output_stream.seek(0)
-    return output_stream
+    return await download_to_file(grid_fs_bucket, video_id, suffix=".mp4")
 
 
 @app.post("/audio")
@@ -63,46 +81,77 @@ async def process_audio(video_id: str):
     Extract audio from GridFS-stored MP4, force English transcription,
     and return JSON with timestamps.
     """
-    # 1) Download video bytes from GridFS
-    video_content = await get_audio(video_id)
-
-    # 2) Save to temp .mp4
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_video:
-        temp_video.write(video_content.read())
-        temp_video_path = temp_video.name
-
-    # 3) Convert to .mp3 via ffmpeg
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_audio:
-        temp_audio_path = temp_audio.name
-
-    ffmpeg_returncode = subprocess.call(
-        [
-            "ffmpeg", "-y",
-            "-i", temp_video_path,
-            temp_audio_path,
-        ]
-    )
-    if ffmpeg_returncode != 0:
-        os.remove(temp_video_path)
-        os.remove(temp_audio_path)
+    # 1) Stream video from GridFS to a temp .mp4
+    temp_video_path = await get_audio(video_id)
+
+    # 2) Decode its audio straight to 16 kHz mono float32 PCM via an ffmpeg pipe
+    try:
+        audio = await decode_pcm(temp_video_path)
+    except DecodeError:
         raise HTTPException(
             status_code=500,
             detail="ffmpeg failed to extract audio. Possibly invalid/corrupted mp4.",
         )
+    finally:
+        os.remove(temp_video_path)
+
+    # 3) Find the speech so silent stretches never reach Whisper
+    total_seconds = len(audio) / SAMPLING_RATE
+    mapping = None
+    speech = audio
+    if VAD_ENABLED:
+        segments = await asyncio.to_thread(
+            find_speech_segments, audio, SAMPLING_RATE, threshold_db=VAD_THRESHOLD_DB
+        )
+        speech, mapping = compact(audio, segments)
+    speech_seconds = len(speech) / SAMPLING_RATE
+    vad_report = {
+        "total_seconds": round(total_seconds, 2),
+        "speech_seconds": round(speech_seconds, 2),
+        "skipped_fraction": round(1 - speech_seconds / total_seconds, 4) if total_seconds else 0.0,
+    }
+    vad_seconds["total"] += total_seconds
+    vad_seconds["skipped"] += total_seconds - speech_seconds
+
+    # 4) Same audio transcribed before with the same model/settings?
+    key = await asyncio.to_thread(
+        cache_key, audio, model=MODEL, generate_kwargs=GENERATE_KWARGS, window_s=WINDOW_SECONDS,
+        overlap_s=OVERLAP_SECONDS, mode=ASR_MODE,
+        backend=ASR_BACKEND,
+        vad=VAD_THRESHOLD_DB if VAD_ENABLED else None,
+    )
+    cached = await transcription_cache.get(key)
+    if cached is not None:
+        return {"transcription": cached, "vad": vad_report}
 
-    # 4) Run whisper pipeline (forced English)
+    # 5) Run whisper pipeline (forced English) on the speech only, then put
+    #    the timestamps back on the original timeline
     try:
-        result = pipeline(temp_audio_path, return_timestamps=True)
-        transcription = result["chunks"]  # "chunks" from the pipeline
+        transcription = await transcriber.transcribe(speech) if len(speech) else []
     except Exception as e:
-        os.remove(temp_video_path)
-        os.remove(temp_audio_path)
         raise HTTPException(
             status_code=500, detail=f"ASR pipeline failed: {str(e)}"
         )
+    if mapping is not None:
+        transcription = remap_chunks(transcription, mapping, SAMPLING_RATE)
+
+    await transcription_cache.put(key, transcription)
+    return {"transcription": transcription, "vad": vad_report}
 
-    # 5) Cleanup temp files
-    os.remove(temp_audio_path)
-    os.remove(temp_video_path)
 
-    return {"transcription": transcription}
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Transcription cache and VAD counters in Prometheus text format.
+    """
+    stats = transcription_cache.stats() if transcription_cache else {}
+    lines = [
+        f'audio_transcription_cache_hits_total{{tier="local"}} {stats.get("hits_local", 0)}',
+        f'audio_transcription_cache_hits_total{{tier="mongo"}} {stats.get("hits_mongo", 0)}',
+        f'audio_transcription_cache_misses_total {stats.get("misses", 0)}',
+        f'audio_transcription_cache_entries {stats.get("entries", 0)}',
+        f'audio_transcription_cache_bytes {stats.get("bytes", 0)}',
+        f'audio_vad_seconds_total{{kind="total"}} {vad_seconds["total"]:.3f}',
+        f'audio_vad_seconds_total{{kind="skipped"}} {vad_seconds["skipped"]:.3f}',
+    ]
+    return "\n".join(lines) + "\n"
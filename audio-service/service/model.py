@@ -0,0 +1,57 @@
+import os
+
+import transformers
+import torch
+
+TASK = "automatic-speech-recognition"
+# "fp32": PyTorch, full precision
+# "int8": PyTorch with the Linear layers dynamically quantized to int8
+# "onnx": ONNX Runtime, exported from the same checkpoint (needs optimum[onnxruntime])
+BACKENDS = ("fp32", "int8", "onnx")
+
+
+def _build(model, processor, generate_kwargs: dict):
+    return transformers.pipeline(
+        task=TASK,
+        model=model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        chunk_length_s=30,
+        device=-1,  # CPU
+        generate_kwargs=generate_kwargs,
+    )
+
+
+def _load_onnx(model: str, onnx_dir: str | None):
+    try:
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+    except ImportError as e:
+        raise RuntimeError("the onnx backend needs `pip install optimum[onnxruntime]`") from e
+
+    # Export once and reuse the exported graphs on later starts
+    onnx_dir = onnx_dir or os.path.join(model, "onnx")
+    if os.path.isdir(onnx_dir):
+        return ORTModelForSpeechSeq2Seq.from_pretrained(onnx_dir)
+    ort_model = ORTModelForSpeechSeq2Seq.from_pretrained(model, export=True)
+    ort_model.save_pretrained(onnx_dir)
+    return ort_model
+
+
+def load_pipeline(model: str, generate_kwargs: dict, backend: str = "fp32", onnx_dir: str | None = None):
+    """
+    Build the Whisper ASR pipeline on CPU with the given inference backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown ASR backend {backend!r}, expected one of {BACKENDS}")
+
+    processor = transformers.WhisperProcessor.from_pretrained(model)
+    if backend == "onnx":
+        return _build(_load_onnx(model, onnx_dir), processor, generate_kwargs)
+
+    # float16 on CPU is either unsupported or slower than fp32, so PyTorch
+    # backends always load full precision weights
+    whisper = transformers.WhisperForConditionalGeneration.from_pretrained(model)
+    whisper.eval()
+    if backend == "int8":
+        whisper = torch.quantization.quantize_dynamic(whisper, {torch.nn.Linear}, dtype=torch.qint8)
+    return _build(whisper, processor, generate_kwargs)
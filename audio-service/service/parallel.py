@@ -0,0 +1,78 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List
+
+import numpy as np
+
+from .inference import SAMPLING_RATE
+from .stitching import overlapping_windows, stitch
+
+# Set in each pool worker by _init_worker
+_worker_pipeline = None
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_worker(model: str, generate_kwargs: dict, backend: str, onnx_dir: str | None):
+    """
+    Load the model once per worker process. One torch thread each, so N
+    workers use N cores instead of fighting over all of them.
+    """
+    global _worker_pipeline
+    import torch
+    from .model import load_pipeline
+
+    torch.set_num_threads(1)
+    _worker_pipeline = load_pipeline(model, generate_kwargs, backend, onnx_dir)
+
+
+def _transcribe_window(audio: np.ndarray) -> List[dict]:
+    result = _worker_pipeline({"raw": audio, "sampling_rate": SAMPLING_RATE}, return_timestamps=True)
+    return result.get("chunks", [])
+
+
+class ParallelTranscriber:
+    """
+    Transcribes long audio across CPU cores: the PCM is split into overlapping
+    windows, each window is transcribed in a process pool (one model per
+    worker), and the timestamped chunks are stitched back together with the
+    duplicated words in the overlaps removed.
+    """
+
+    def __init__(self, model: str, generate_kwargs: dict, workers: int = 0,
+                 window_s: float = 30.0, overlap_s: float = 5.0,
+                 backend: str = "fp32", onnx_dir: str | None = None):
+        self.workers = workers or available_cpus()
+        self.window_s = window_s
+        self.overlap_s = overlap_s
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model, generate_kwargs, backend, onnx_dir),
+        )
+
+    async def start(self):
+        """Workers start (and load the model) on first use."""
+
+    async def stop(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def transcribe(self, audio: np.ndarray) -> List[dict]:
+        loop = asyncio.get_running_loop()
+        ranges = overlapping_windows(len(audio), SAMPLING_RATE, self.window_s, self.overlap_s)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _transcribe_window, audio[start:end])
+            for start, end in ranges
+        ))
+        return stitch([
+            (start / SAMPLING_RATE, (end - start) / SAMPLING_RATE, chunks)
+            for (start, end), chunks in zip(ranges, results)
+        ])
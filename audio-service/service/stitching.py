@@ -0,0 +1,99 @@
+from typing import List, Tuple
+
+# (offset of the window on the original timeline, window length, chunks with
+# timestamps relative to the window start) -- one per transcribed window
+WindowResult = Tuple[float, float, List[dict]]
+
+
+def overlapping_windows(n_samples: int, sampling_rate: int, window_s: float, overlap_s: float) -> List[Tuple[int, int]]:
+    """
+    Sample ranges [start, end) of windows of window_s seconds, each starting
+    window_s - overlap_s after the previous one, covering all n_samples.
+    """
+    window = int(window_s * sampling_rate)
+    step = int((window_s - overlap_s) * sampling_rate)
+    if step <= 0:
+        raise ValueError("overlap must be shorter than the window")
+
+    ranges = []
+    start = 0
+    while True:
+        end = min(start + window, n_samples)
+        ranges.append((start, end))
+        if end >= n_samples:
+            break
+        start += step
+    return ranges
+
+
+def _words(text: str) -> List[str]:
+    return [w.strip(".,!?;:\"'").lower() for w in text.split()]
+
+
+def _drop_repeated_words(previous_text: str, text: str, max_words: int = 8) -> str:
+    """
+    Remove the words at the start of `text` that were already heard at the
+    end of `previous_text` (the same speech transcribed in both windows'
+    overlap): the longest prefix of `text` that ends `previous_text`, or all
+    of `text` if it appears word for word in that tail.
+    """
+    prev = _words(previous_text)[-max_words:]
+    words = text.split()
+    normalized = _words(text)
+    for n in range(min(len(prev), len(words)), 0, -1):
+        if prev[-n:] == normalized[:n]:
+            return (" " if text.startswith(" ") else "") + " ".join(words[n:])
+    n = len(normalized)
+    if n and any(prev[i:i + n] == normalized for i in range(len(prev) - n + 1)):
+        return ""
+    return text
+
+
+def stitch(windows: List[WindowResult]) -> List[dict]:
+    """
+    Merge per-window transcriptions of overlapping windows into one list of
+    chunks on the original timeline.
+
+    Each overlap is cut at its midpoint. The earlier window keeps the chunks
+    that start before the cut, and the later window the chunks that end
+    after it, so speech that straddles the cut is kept from both sides;
+    words the later window repeats from the earlier one are then dropped.
+    Chunks keep their own timestamps, so pauses stay where Whisper heard
+    them. Only overlaps are resolved: a chunk starting before the previous
+    one ends starts at that end instead, and an open-ended chunk (end None)
+    ends where the next one starts, or at the end of its window.
+    """
+    windows = sorted(windows, key=lambda w: w[0])
+    # (start, end, text, inside the previous window's overlap, open-ended)
+    kept: List[Tuple[float, float, str, bool, bool]] = []
+
+    for i, (offset, length, chunks) in enumerate(windows):
+        window_end = offset + length
+        previous_end = windows[i - 1][0] + windows[i - 1][1] if i > 0 else float("-inf")
+        lower = (previous_end + offset) / 2 if i > 0 else float("-inf")
+        upper = (window_end + windows[i + 1][0]) / 2 if i + 1 < len(windows) else float("inf")
+
+        for chunk in chunks:
+            start, end = chunk["timestamp"]
+            start = offset + (start or 0.0)
+            open_ended = end is None
+            end = window_end if open_ended else min(offset + end, window_end)
+            if start < upper and max(start, end) > lower:
+                kept.append((start, end, chunk["text"], start < previous_end, open_ended))
+
+    stitched: List[dict] = []
+    previous_open = False
+    for start, end, text, in_overlap, open_ended in kept:
+        if in_overlap and stitched:
+            text = _drop_repeated_words(" ".join(c["text"] for c in stitched[-3:]), text)
+            if not text.strip():
+                continue
+        if stitched:
+            prev_start, prev_end = stitched[-1]["timestamp"]
+            if previous_open and prev_start <= start < prev_end:
+                stitched[-1]["timestamp"] = (prev_start, round(start, 2))
+            start = max(start, stitched[-1]["timestamp"][1])
+        end = max(end, start)
+        stitched.append({"timestamp": (round(start, 2), round(end, 2)), "text": text})
+        previous_open = open_ended
+    return stitched
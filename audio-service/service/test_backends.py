@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("torch")
+
+from .fixtures import load_fixtures, weights_present
+from .wer import wer
+
+MODEL = "./whisper-tiny"
+GENERATE_KWARGS = {"language": "en", "task": "transcribe"}
+MAX_WER_DELTA = 0.05
+
+fixtures = load_fixtures()
+pytestmark = pytest.mark.skipif(not weights_present(MODEL), reason="needs the whisper-tiny weights (git lfs pull)")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def fixture_clips():
+    # With the weights present, missing clips are an error: skipping would
+    # leave the backends silently uncompared
+    if not fixtures:
+        pytest.fail("no fixture clips in fixtures/; fetch them as described in fixtures/README.md")
+
+
+def mean_wer(pipeline):
+    errors = []
+    for audio, reference in fixtures:
+        prediction = pipeline({"raw": audio, "sampling_rate": 16000})["text"]
+        errors.append(wer(reference.lower(), prediction.lower()))
+    return sum(errors) / len(errors)
+
+
+@pytest.fixture(scope="module")
+def fp32_wer():
+    from .model import load_pipeline
+    return mean_wer(load_pipeline(MODEL, GENERATE_KWARGS, "fp32"))
+
+
+@pytest.mark.parametrize("backend", ["int8", "onnx"])
+def test_backend_matches_fp32(backend, fp32_wer):
+    if backend == "onnx":
+        pytest.importorskip("optimum.onnxruntime")
+    from .model import load_pipeline
+
+    backend_wer = mean_wer(load_pipeline(MODEL, GENERATE_KWARGS, backend))
+    assert backend_wer - fp32_wer <= MAX_WER_DELTA
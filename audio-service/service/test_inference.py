@@ -0,0 +1,51 @@
+import asyncio
+
+import numpy as np
+
+from .inference import SAMPLING_RATE, BatchedTranscriber
+
+
+class FakePipeline:
+    """
+    "Hears" one word per second of audio: second k of the input is filled
+    with the value k, and is transcribed as " w<k>".
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, inputs, batch_size, return_timestamps):
+        self.batch_sizes.append(len(inputs))
+        outputs = []
+        for item in inputs:
+            seconds = item["raw"][::SAMPLING_RATE]
+            outputs.append({"chunks": [
+                {"timestamp": (float(i), float(i + 1)), "text": f" w{int(value)}"}
+                for i, value in enumerate(seconds)
+            ]})
+        return outputs
+
+
+def spoken_audio(seconds: int) -> np.ndarray:
+    return np.repeat(np.arange(seconds, dtype=np.float32), SAMPLING_RATE)
+
+
+def test_overlapping_windows_are_batched_and_stitched_without_loss():
+    pipeline = FakePipeline()
+
+    async def run():
+        transcriber = BatchedTranscriber(pipeline, max_batch_size=8, max_wait_ms=20)
+        await transcriber.start()
+        try:
+            return await asyncio.gather(transcriber.transcribe(spoken_audio(70)),
+                                        transcriber.transcribe(spoken_audio(40)))
+        finally:
+            await transcriber.stop()
+
+    long, short = asyncio.run(run())
+
+    assert "".join(c["text"] for c in long).split() == [f"w{k}" for k in range(70)]
+    assert "".join(c["text"] for c in short).split() == [f"w{k}" for k in range(40)]
+    # every word keeps the time it was heard at, across the window seams
+    assert [c["timestamp"] for c in long] == [(float(k), float(k + 1)) for k in range(70)]
+    assert pipeline.batch_sizes == [5]  # 3 + 2 windows in one forward pass
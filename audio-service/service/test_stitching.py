@@ -0,0 +1,119 @@
+from .stitching import overlapping_windows, stitch
+
+
+def window(offset, length, *chunks):
+    return offset, length, [{"timestamp": ts, "text": text} for ts, text in chunks]
+
+
+def assert_monotonic(chunks):
+    for chunk in chunks:
+        start, end = chunk["timestamp"]
+        assert start <= end
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert cur["timestamp"][0] >= prev["timestamp"][1]
+
+
+def text_of(chunks):
+    return "".join(c["text"] for c in chunks).split()
+
+
+def timestamps(chunks):
+    return [c["timestamp"] for c in chunks]
+
+
+def test_overlapping_windows_cover_everything():
+    sr = 16000
+    ranges = overlapping_windows(95 * sr, sr, window_s=30, overlap_s=5)
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == 95 * sr
+    for (s1, e1), (s2, e2) in zip(ranges, ranges[1:]):
+        assert s2 < e1  # consecutive windows overlap
+        assert e1 - s2 == 5 * sr
+
+
+def test_stitch_keeps_all_speech_and_the_chunks_own_timestamps():
+    windows = [
+        window(0.0, 30.0,
+               ((0.5, 9.0), " The quick brown fox"),
+               ((9.5, 20.0), " jumps over the lazy dog."),
+               ((21.0, 29.0), " Then it runs away")),
+        window(25.0, 30.0,
+               ((0.0, 4.0), " runs away into the woods."),
+               ((4.5, 15.0), " Nobody saw it again."),
+               ((16.0, None), " The end.")),
+        window(50.0, 12.0,
+               ((0.0, 3.0), " The end."),
+               ((3.0, 10.0), " Credits roll.")),
+    ]
+    stitched = stitch(windows)
+
+    assert text_of(stitched) == ("The quick brown fox jumps over the lazy dog. Then it runs away into the woods. "
+                                 "Nobody saw it again. The end. Credits roll.").split()
+    # Pauses are kept. Only the chunk heard in both windows is moved (it
+    # starts where the earlier window's chunk ends), and the open-ended
+    # "The end." ends where "Credits roll." starts.
+    assert timestamps(stitched) == [
+        (0.5, 9.0), (9.5, 20.0), (21.0, 29.0), (29.0, 29.0), (29.5, 40.0), (41.0, 53.0), (53.0, 60.0),
+    ]
+    assert_monotonic(stitched)
+
+
+def test_stitch_keeps_a_chunk_the_cut_splits_and_drops_one_heard_twice():
+    windows = [
+        window(0.0, 30.0,
+               ((0.0, 20.0), " One two three."),
+               ((20.0, 29.5), " Four five six")),
+        window(25.0, 30.0,
+               ((2.0, 3.0), " five"),  # already heard in full
+               ((3.0, 4.0), " six seven."),
+               ((4.0, 9.0), " Eight.")),
+    ]
+    stitched = stitch(windows)
+
+    assert text_of(stitched) == "One two three. Four five six seven. Eight.".split()
+    assert timestamps(stitched) == [(0.0, 20.0), (20.0, 29.5), (29.5, 29.5), (29.5, 34.0)]
+
+
+def test_stitch_drops_words_repeated_across_the_overlap():
+    windows = [
+        window(0.0, 30.0,
+               ((0.0, 10.0), " Hello there"),
+               ((10.0, 27.0), " open your book to")),
+        window(25.0, 30.0,
+               ((2.5, 6.0), " book to the first page."),
+               ((6.0, 12.0), " Thank you.")),
+    ]
+    stitched = stitch(windows)
+
+    assert text_of(stitched) == "Hello there open your book to the first page. Thank you.".split()
+    assert timestamps(stitched) == [(0.0, 10.0), (10.0, 27.0), (27.5, 31.0), (31.0, 37.0)]
+
+
+def test_stitch_unordered_windows_and_inverted_timestamps():
+    windows = [
+        window(25.0, 10.0, ((3.0, 5.0), " b"), ((6.0, 5.5), " c")),
+        window(0.0, 30.0, ((0.0, 12.0), " a")),
+    ]
+    stitched = stitch(windows)
+
+    assert [c["text"] for c in stitched] == [" a", " b", " c"]
+    assert timestamps(stitched) == [(0.0, 12.0), (28.0, 30.0), (31.0, 31.0)]
+    assert_monotonic(stitched)
+
+
+def test_stitch_timestamps_stay_close_to_what_was_heard():
+    # one word per second, with a 1 s pause after every 7th, heard by 30 s
+    # windows overlapping by 5 s; every word on the same clock in each window
+    words = [(float(t), float(t) + 0.8, f" w{t}") for t in range(90) if t % 8 != 7]
+    windows = []
+    for offset in (0.0, 25.0, 50.0, 75.0):
+        length = min(30.0, 90.0 - offset)
+        windows.append(window(offset, length, *(
+            ((start - offset, end - offset), text) for start, end, text in words
+            if offset <= start and end <= offset + length
+        )))
+    stitched = stitch(windows)
+
+    assert text_of(stitched) == [text.strip() for _, _, text in words]
+    for chunk, (start, end, _) in zip(stitched, words):
+        assert abs(chunk["timestamp"][0] - start) < 0.01 and abs(chunk["timestamp"][1] - end) < 0.01
@@ -0,0 +1,43 @@
+import numpy as np
+
+from .vad import compact, find_speech_segments, remap_chunks
+
+SR = 16000
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+
+def test_finds_speech_between_silences():
+    audio = np.concatenate([silence(2), tone(3), silence(15), tone(2), silence(5)])
+    segments = find_speech_segments(audio, SR)
+
+    assert len(segments) == 2
+    (s1, e1), (s2, e2) = segments
+    assert s1 / SR < 2.0 < 5.0 < e1 / SR < 6.0
+    assert 19.0 < s2 / SR < 20.0 < 22.0 < e2 / SR
+
+
+def test_all_silence_has_no_segments():
+    assert find_speech_segments(silence(10), SR) == []
+
+
+def test_remap_puts_timestamps_back_on_original_timeline():
+    audio = np.concatenate([silence(10), tone(4), silence(20), tone(4)])
+    compacted, mapping = compact(audio, [(10 * SR, 14 * SR), (34 * SR, 38 * SR)])
+    assert len(compacted) == 8 * SR
+
+    chunks = [
+        {"timestamp": (0.5, 4.0), "text": " first"},
+        {"timestamp": (4.0, 7.0), "text": " second"},
+        {"timestamp": (7.0, None), "text": " tail"},
+    ]
+    remapped = remap_chunks(chunks, mapping, SR)
+
+    assert [c["timestamp"] for c in remapped] == [(10.5, 14.0), (34.0, 37.0), (37.0, None)]
@@ -0,0 +1,109 @@
+from typing import List, Tuple
+
+import numpy as np
+
+# (start, end) sample range of one speech segment in the original audio
+Segment = Tuple[int, int]
+
+
+def find_speech_segments(
+    audio: np.ndarray,
+    sampling_rate: int,
+    frame_ms: int = 30,
+    threshold_db: float = -45.0,
+    noise_margin_db: float = 10.0,
+    min_silence_ms: int = 600,
+    min_speech_ms: int = 200,
+    pad_ms: int = 200,
+) -> List[Segment]:
+    """
+    Energy-based voice activity detection.
+
+    A frame counts as speech when its RMS level is above both `threshold_db`
+    (dBFS) and the estimated noise floor (10th percentile of frame levels)
+    plus `noise_margin_db`. Speech runs separated by less than
+    `min_silence_ms` are merged, runs shorter than `min_speech_ms` dropped,
+    and each segment padded by `pad_ms` so word edges aren't clipped.
+    """
+    frame = max(1, sampling_rate * frame_ms // 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame).astype(np.float64)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    level_db = 20 * np.log10(np.maximum(rms, 1e-10))
+    threshold = max(threshold_db, np.percentile(level_db, 10) + noise_margin_db)
+    voiced = level_db > threshold
+
+    # Runs of voiced frames as [start_frame, end_frame)
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    runs = list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+    min_silence = min_silence_ms / frame_ms
+    merged: List[List[int]] = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] < min_silence:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    pad = sampling_rate * pad_ms // 1000
+    min_speech = sampling_rate * min_speech_ms // 1000
+    segments: List[Segment] = []
+    for start, end in merged:
+        s = max(0, int(start) * frame - pad)
+        e = min(len(audio), int(end) * frame + pad)
+        if e - s - 2 * pad < min_speech:
+            continue
+        if segments and s <= segments[-1][1]:
+            segments[-1] = (segments[-1][0], e)
+        else:
+            segments.append((s, e))
+    return segments
+
+
+def compact(audio: np.ndarray, segments: List[Segment]) -> Tuple[np.ndarray, List[Tuple[int, int, int]]]:
+    """
+    Concatenate the speech segments. Returns the compacted audio and a map of
+    (compacted start, original start, length) in samples for remap_chunks.
+    """
+    mapping = []
+    position = 0
+    for start, end in segments:
+        mapping.append((position, start, end - start))
+        position += end - start
+    if not segments:
+        return audio[:0], mapping
+    return np.concatenate([audio[s:e] for s, e in segments]), mapping
+
+
+def _to_original(t: float, mapping, sampling_rate: int, is_end: bool) -> float:
+    sample = float(t) * sampling_rate
+    for compact_start, original_start, length in mapping:
+        # A time exactly on a boundary belongs to the earlier segment for an
+        # end timestamp and to the later one for a start timestamp
+        inside = sample <= compact_start + length if is_end else sample < compact_start + length
+        if inside:
+            return (original_start + max(0.0, sample - compact_start)) / sampling_rate
+    compact_start, original_start, length = mapping[-1]
+    return (original_start + length) / sampling_rate
+
+
+def remap_chunks(chunks: List[dict], mapping, sampling_rate: int) -> List[dict]:
+    """
+    Move chunk timestamps from the compacted timeline back onto the original one.
+    """
+    if not mapping:
+        return chunks
+    remapped = []
+    for chunk in chunks:
+        start, end = chunk["timestamp"]
+        remapped.append({
+            "timestamp": (
+                None if start is None else round(_to_original(start, mapping, sampling_rate, False), 2),
+                None if end is None else round(_to_original(end, mapping, sampling_rate, True), 2),
+            ),
+            "text": chunk["text"],
+        })
+    return remapped
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def wer(reference: str, prediction: str) -> float:
+    ref_words = reference.split()
+    hyp_words = prediction.split()
+    
+    # Lengths of the sentences
+    n = len(ref_words)
+    m = len(hyp_words)
+    
+    # Create a (n+1) x (m+1) matrix
+    dp = np.zeros((n + 1, m + 1), dtype=np.int32)
+    
+    # Initialize the matrix
+    for i in range(n + 1):
+        dp[i][0] = i  # Deletion cost
+    for j in range(m + 1):
+        dp[0][j] = j  # Insertion cost
+    
+    # Fill the matrix
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if ref_words[i - 1] == hyp_words[j - 1]:
+                dp[i][j] = dp[i - 1][j - 1]  # No error
+            else:
+                substitution = dp[i - 1][j - 1] + 1
+                insertion = dp[i][j - 1] + 1
+                deletion = dp[i - 1][j] + 1
+                dp[i][j] = min(substitution, insertion, deletion)
+    
+    # The edit distance
+    edit_distance = dp[n][m]
+    
+    # Calculate the WER
+    wer = edit_distance / n
+    return wer
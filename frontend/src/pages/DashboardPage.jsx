@@ -16,7 +16,9 @@ const DashboardPage = ({ user }) => {
   const navigate = useNavigate();
 
   useEffect(() => {
-    const wsUrl = "ws://localhost:8082/ws";
+    // Events are only sent for this user's videos
+    const userId = user?.userId || "unknown";
+    const wsUrl = `ws://localhost:8082/ws?user_id=${encodeURIComponent(userId)}`;
     const ws = new WebSocket(wsUrl);
 
     ws.onopen = () => {
@@ -48,7 +50,7 @@ const DashboardPage = ({ user }) => {
         ws.close();
       }
     };
-  }, []);
+  }, [user]);
 
   // Mimic logic only if mimicOnLoad === true (currently false)
   useEffect(() => {
@@ -0,0 +1,120 @@
+"""
+WebSocket fan-out: delivery latency of video_processed events.
+
+Simulates --clients connections spread over --users users (in-process fake
+sockets; a fraction of them are slow and take --slow-delay per send) and
+publishes --events events at --rate per second, each for a random user.
+Reports p50/p99 delivery latency to the event's own user (publish to send
+done), total sends and dropped clients, for:
+  - broadcast: the previous behaviour, every event awaited on every client
+    in turn (one task per event, like concurrent requests),
+  - manager: ConnectionManager, per-user routing with per-client queues.
+Run from the monitoring-service directory:
+
+    python -m benchmarks.bench_fanout --clients 5000 --users 1000 --events 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from service.connections import ConnectionManager
+
+
+class SimulatedSocket:
+    def __init__(self, user_id: str, delay: float, stats: dict):
+        self.user_id = user_id
+        self.delay = delay
+        self.stats = stats
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.stats["sends"] += 1
+        message = json.loads(text)
+        if message["user_id"] == self.user_id:
+            self.stats["latencies"].append(time.perf_counter() - message["t"])
+
+    async def send_json(self, message):
+        await self.send_text(json.dumps(message))
+
+
+async def run(mode: str, args) -> dict:
+    rng = random.Random(args.seed)
+    stats = {"sends": 0, "latencies": []}
+    sockets = [
+        SimulatedSocket(f"user{i % args.users}", args.slow_delay if rng.random() < args.slow else 0, stats)
+        for i in range(args.clients)
+    ]
+    per_user = {}
+    for ws in sockets:
+        per_user[ws.user_id] = per_user.get(ws.user_id, 0) + 1
+
+    manager = ConnectionManager(queue_size=args.queue_size)
+    if mode == "manager":
+        for ws in sockets:
+            await manager.connect(ws, ws.user_id)
+
+    async def broadcast(message: dict):
+        for ws in sockets:
+            try:
+                await ws.send_json(message)
+            except Exception:
+                pass
+
+    expected, tasks = 0, []
+    start = time.perf_counter()
+    for i in range(args.events):
+        user_id = f"user{rng.randrange(args.users)}"
+        expected += per_user.get(user_id, 0)
+        message = {"event": "video_processed", "video_id": f"{user_id}_{i}.mp4", "user_id": user_id,
+                   "t": time.perf_counter()}
+        if mode == "manager":
+            manager.send_to_user(user_id, message)
+        else:
+            tasks.append(asyncio.create_task(broadcast(message)))
+        await asyncio.sleep(1 / args.rate)
+
+    while len(stats["latencies"]) < expected - manager.dropped and time.perf_counter() - start < args.timeout:
+        await asyncio.sleep(0.01)
+    for task in tasks:
+        task.cancel()
+    for clients in list(manager.clients.values()):
+        for client in list(clients):
+            manager.disconnect(client)
+
+    latencies = sorted(stats["latencies"])
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else float("nan")
+    return {"p50": pct(0.50), "p99": pct(0.99), "delivered": len(latencies), "expected": expected,
+            "sends": stats["sends"], "dropped": manager.dropped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50, help="events per second")
+    parser.add_argument("--slow", type=float, default=0.005, help="fraction of slow clients")
+    parser.add_argument("--slow-delay", type=float, default=0.02, help="seconds per send to a slow client")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=120, help="give up waiting for deliveries after this")
+    parser.add_argument("--modes", nargs="+", default=["broadcast", "manager"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10}  {'p50 ms':>9}  {'p99 ms':>9}  {'delivered':>13}  {'sends':>8}  {'dropped':>7}")
+    for mode in args.modes:
+        r = asyncio.run(run(mode, args))
+        print(f"{mode:>10}  {r['p50']:>9.1f}  {r['p99']:>9.1f}  {r['delivered']:>6}/{r['expected']:<6}"
+              f"  {r['sends']:>8}  {r['dropped']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+raw_video_id lookup latency as the videos table grows.
+
+Fills the table up to each size in --sizes, then times, on random existing
+raw_video_ids:
+  - the start upsert and the end update (unique index on raw_video_id),
+  - the previous lookup, SELECT ... WHERE raw_video_id = ? LIMIT 1, on a copy
+    of the table without the index (a sequential scan).
+Uses a SQLite file through aiosqlite by default; --url points it at Postgres.
+Run from the monitoring-service directory:
+
+    python -m benchmarks.bench_lookups --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from service.crud import mark_processing_end, upsert_processing_start
+from service.database import make_engine
+from service.models import Base, VideoStatusDB
+
+BATCH = 20000
+
+# the videos table as it was: no index on raw_video_id
+unindexed = Table(
+    "videos_unindexed", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("user_id", String),
+    Column("raw_video_id", String),
+    Column("status", String),
+)
+
+
+async def fill(engine, start: int, stop: int):
+    now = datetime.utcnow()
+    for lo in range(start, stop, BATCH):
+        rows = [
+            {"user_id": f"user{i % 1000}", "raw_video_id": f"user{i % 1000}_{i}.mp4", "status": "done"}
+            for i in range(lo, min(stop, lo + BATCH))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(VideoStatusDB), [dict(r, upload_time=now) for r in rows])
+            await conn.execute(insert(unindexed), rows)
+
+
+async def timed(samples: int, size: int, call) -> float:
+    """
+    Median milliseconds of `call(video_id)` over random existing ids.
+    """
+    times = []
+    for _ in range(samples):
+        i = random.randrange(size)
+        start = time.perf_counter()
+        await call(f"user{i % 1000}_{i}.mp4")
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+async def run(url: str, sizes, samples: int, scan_samples: int):
+    engine = make_engine(url, echo=False)
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(unindexed.metadata.drop_all)
+        await conn.run_sync(unindexed.metadata.create_all)
+
+    async def start(video_id):
+        async with sessions() as db:
+            await upsert_processing_start(db, video_id, "bench")
+
+    async def end(video_id):
+        async with sessions() as db:
+            await mark_processing_end(db, video_id, {"processed_video_id": "p"})
+
+    async def scan(video_id):
+        async with sessions() as db:
+            await db.execute(select(unindexed).where(unindexed.c.raw_video_id == video_id).limit(1))
+
+    print(f"{'rows':>9}  {'start upsert':>13}  {'end update':>11}  {'unindexed select':>17}   (median ms)")
+    filled = 0
+    for size in sorted(sizes):
+        load_start = time.perf_counter()
+        await fill(engine, filled, size)
+        filled = size
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+        print(f"  (loaded {size} rows in {time.perf_counter() - load_start:.1f} s)")
+        print(f"{size:>9}  {await timed(samples, size, start):>13.3f}  {await timed(samples, size, end):>11.3f}"
+              f"  {await timed(scan_samples, size, scan):>17.3f}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--scan-samples", type=int, default=50, help="samples of the slow unindexed lookup")
+    parser.add_argument("--url", help="database URL (default: a fresh SQLite file)")
+    args = parser.parse_args()
+    url = args.url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(url, args.sizes, args.samples, args.scan_samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+-- Unique index on videos.raw_video_id, for databases created before it
+-- existed (create_all only creates missing tables, not missing indexes).
+--
+--   psql "$DATABASE_URL" -f migrations/001_unique_raw_video_id.sql
+--
+-- Stop the old monitoring service first (e.g. scale its deployment to 0)
+-- and deploy the new one after this succeeds. The old start handler can
+-- insert a duplicate between the DELETE and the index build, which makes
+-- the build fail; the new one needs the index for ON CONFLICT.
+--
+-- Run it with psql, outside a transaction: CREATE INDEX CONCURRENTLY builds
+-- the index without locking the table against writes. It is safe to rerun.
+
+\set ON_ERROR_STOP on
+
+-- A failed concurrent build leaves an INVALID index behind, which
+-- IF NOT EXISTS would then skip for good: drop it so the build is retried.
+SELECT format('DROP INDEX CONCURRENTLY %I.%I', n.nspname, c.relname)
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relname = 'ix_videos_raw_video_id'
+  AND NOT i.indisvalid
+\gexec
+
+-- The start handler used to insert duplicates under concurrent events:
+-- keep the most recent record of each raw_video_id.
+DELETE FROM videos a
+USING videos b
+WHERE a.raw_video_id = b.raw_video_id
+  AND a.id < b.id;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_videos_raw_video_id ON videos (raw_video_id);
@@ -0,0 +1,79 @@
+# backplane.py
+import asyncio
+import json
+
+import redis.asyncio as redis
+
+from .connections import ConnectionManager
+
+
+class Backplane:
+    """
+    Redis pub/sub between monitoring-service replicas. A replica publishes
+    every event to one channel instead of delivering it itself; every replica
+    (the publisher included) is subscribed and hands each event to its own
+    ConnectionManager, which routes it to that user's local connections. So
+    an event reaches the user's sockets whichever replica they're on.
+    """
+
+    def __init__(self, client: redis.Redis, connections: ConnectionManager,
+                 channel: str = "monitoring:video_events", retry_seconds: float = 1.0):
+        self.client = client
+        self.connections = connections
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self._listener: asyncio.Task | None = None
+        self._subscribed = asyncio.Event()
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+
+    async def wait_subscribed(self, timeout: float = 5.0):
+        await asyncio.wait_for(self._subscribed.wait(), timeout)
+
+    async def publish(self, user_id: str, message: dict):
+        """
+        Send `message` to `user_id`'s connections on every replica. If Redis is
+        unreachable, deliver to this replica's connections only.
+        """
+        try:
+            await self.client.publish(self.channel, json.dumps({"user_id": user_id, "message": message}, default=str))
+        except redis.RedisError as e:
+            print(f"[Backplane] Publish failed ({e}), delivering locally only")
+            self.connections.send_to_user(user_id, message)
+
+    def _deliver(self, data):
+        try:
+            event = json.loads(data)
+            self.connections.send_to_user(event["user_id"], event["message"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[Backplane] Ignoring malformed event on {self.channel}: {e}")
+
+    async def _listen(self):
+        """
+        Deliver events from the channel until cancelled, resubscribing after
+        a lost Redis connection.
+        """
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self._subscribed.set()
+                print(f"[Backplane] Subscribed to {self.channel}")
+                async for item in pubsub.listen():
+                    if item["type"] == "message":
+                        self._deliver(item["data"])
+            except redis.RedisError as e:
+                self._subscribed.clear()
+                print(f"[Backplane] Lost subscription to {self.channel} ({e}), retrying in {self.retry_seconds}s")
+                await asyncio.sleep(self.retry_seconds)
+            finally:
+                await pubsub.aclose()
@@ -0,0 +1,93 @@
+# connections.py
+import asyncio
+import json
+from typing import Dict, Set
+
+from fastapi import WebSocket
+
+
+class Client:
+    """
+    One WebSocket connection: its user, its bounded outbound queue and the
+    task that drains the queue into the socket.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: str, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: asyncio.Task | None = None
+
+
+class ConnectionManager:
+    """
+    WebSocket connections registered per user_id. Messages go only to the
+    affected user's connections, by way of each connection's own queue and
+    sender task: publishing never waits on a socket, so a slow client delays
+    nobody else. A client whose queue fills up (it stopped reading) is dropped.
+    """
+
+    def __init__(self, queue_size: int = 64, close_timeout: float = 1.0):
+        self.queue_size = queue_size
+        self.close_timeout = close_timeout
+        self.clients: Dict[str, Set[Client]] = {}
+        self.dropped = 0  # clients dropped for overflowing their queue
+
+    def __len__(self) -> int:
+        return sum(len(clients) for clients in self.clients.values())
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> Client:
+        await websocket.accept()
+        client = Client(websocket, user_id, self.queue_size)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self.clients.setdefault(user_id, set()).add(client)
+        return client
+
+    def disconnect(self, client: Client):
+        clients = self.clients.get(client.user_id)
+        if clients is None or client not in clients:
+            return
+        clients.discard(client)
+        if not clients:
+            del self.clients[client.user_id]
+        if client.sender and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def send_to_user(self, user_id: str, message: dict) -> int:
+        """
+        Queue `message` for every connection of `user_id` (serialized once) and
+        return how many connections it was queued for.
+        """
+        clients = self.clients.get(user_id)
+        if not clients:
+            return 0
+        text = json.dumps(message, default=str)
+        queued = 0
+        for client in list(clients):
+            try:
+                client.queue.put_nowait(text)
+                queued += 1
+            except asyncio.QueueFull:
+                print(f"[ConnectionManager] Dropping slow client of user {user_id}: "
+                      f"{self.queue_size} messages queued")
+                self.dropped += 1
+                self.disconnect(client)
+                asyncio.create_task(self._close(client.websocket, code=1013))  # "try again later"
+        return queued
+
+    async def _send_loop(self, client: Client):
+        try:
+            while True:
+                text = await client.queue.get()
+                await client.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ConnectionManager] Send to user {client.user_id} failed: {e}")
+            self.disconnect(client)
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), self.close_timeout)
+        except Exception:
+            pass
@@ -0,0 +1,104 @@
+# crud.py
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, cast, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import VideoStatusDB
+
+# INSERT ... ON CONFLICT is dialect specific in SQLAlchemy; both support RETURNING
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _dialect(db: AsyncSession) -> str:
+    return db.bind.dialect.name
+
+
+def _seconds_since(column, now: datetime, dialect: str):
+    """
+    Whole seconds from `column` to `now`, computed by the database.
+    """
+    if dialect == "sqlite":
+        # julianday is a float in days: round away its error before truncating
+        return cast(func.round((func.julianday(now) - func.julianday(column)) * 86400, 3), Integer)
+    return cast(func.extract("epoch", now - column), Integer)
+
+
+async def create_video(db: AsyncSession, video_id: str, user_id: str,
+                       now: Optional[datetime] = None) -> bool:
+    """
+    Create the record of a new upload (uploaded at `now`, default the current
+    time), unless `video_id` already has one. Returns True if it was created.
+    The caller commits.
+    """
+    now = now or datetime.utcnow()
+    insert = _INSERTS[_dialect(db)]
+    stmt = insert(VideoStatusDB).values(
+        user_id=user_id,
+        raw_video_id=video_id,
+        status="uploaded",
+        video_processing_status="inqueue",
+        upload_time=now,
+    ).on_conflict_do_nothing(index_elements=[VideoStatusDB.raw_video_id]).returning(VideoStatusDB.id)
+    return (await db.execute(stmt)).first() is not None
+
+
+async def upsert_processing_start(db: AsyncSession, video_id: str, user_id: Optional[str],
+                                  now: Optional[datetime] = None) -> bool:
+    """
+    Mark processing started (at `now`, default the current time) for
+    `video_id`, creating its record if there is none, in one
+    INSERT ... ON CONFLICT statement (concurrent start events can't create
+    duplicates). A given `user_id` is stored on the record; None keeps the
+    one it was created with. Returns True if the record was created. The
+    caller commits.
+    """
+    now = now or datetime.utcnow()
+    insert = _INSERTS[_dialect(db)]
+    stmt = insert(VideoStatusDB).values(
+        user_id=user_id,
+        raw_video_id=video_id,
+        status="uploaded",
+        video_processing_status="processing",
+        video_processing_start=now,
+        upload_time=now,
+    )
+    set_ = {"video_processing_status": "processing", "video_processing_start": now}
+    if user_id:
+        set_["user_id"] = user_id
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoStatusDB.raw_video_id], set_=set_,
+    ).returning(VideoStatusDB.upload_time)
+    upload_time = (await db.execute(stmt)).scalar_one()
+    # an existing record keeps its own upload_time
+    return upload_time == now
+
+
+async def mark_processing_end(db: AsyncSession, video_id: str, data: dict,
+                              now: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Mark `video_id` done (at `now`, default the current time), set its total
+    processing time and any ids in `data`, in one UPDATE ... RETURNING
+    statement. Returns the record's user_id, raw_video_id and
+    transcription_id, or None if there is no record. The caller commits.
+    """
+    now = now or datetime.utcnow()
+    values = {
+        "status": "done",
+        "video_processing_status": "done",
+        "video_processing_end": now,
+        "total_processing_time": _seconds_since(VideoStatusDB.upload_time, now, _dialect(db)),
+    }
+    for key in ("processed_video_id", "transcription_id"):
+        if key in data:
+            values[key] = data[key]
+    stmt = (
+        update(VideoStatusDB)
+        .where(VideoStatusDB.raw_video_id == video_id)
+        .values(**values)
+        .returning(VideoStatusDB.user_id, VideoStatusDB.raw_video_id, VideoStatusDB.transcription_id)
+    )
+    row = (await db.execute(stmt)).first()
+    return dict(row._mapping) if row else None
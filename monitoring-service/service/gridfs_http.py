@@ -0,0 +1,134 @@
+import mimetypes
+import re
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from gridfs.errors import NoFile
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, length: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) byte range from a single-range `Range` header, or
+    None when the header should be ignored (malformed or multi-range). Raises
+    ValueError when the range can't be satisfied for a file of `length` bytes.
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("empty suffix range")
+        return max(0, length - suffix), length - 1
+    start = int(first)
+    end = min(int(last), length - 1) if last else length - 1
+    if start >= length or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _content_type(grid_out) -> str:
+    metadata = grid_out.metadata or {}
+    return (
+        metadata.get("content_type")
+        or mimetypes.guess_type(grid_out.filename or "")[0]
+        or "application/octet-stream"
+    )
+
+
+async def _stream(grid_out, start: int, length: int):
+    """
+    Yield `length` bytes from `start`. Seeking makes GridFS fetch chunks from
+    the one containing `start` onwards instead of reading from byte 0.
+    """
+    grid_out.seek(start)
+    remaining = length
+    while remaining > 0:
+        data = await grid_out.read(min(remaining, grid_out.chunk_size))
+        if not data:
+            break
+        remaining -= len(data)
+        yield data
+
+
+async def gridfs_response(grid_fs_bucket, file_id: str, headers) -> Response:
+    """
+    Serve a GridFS file by _id with Content-Length, Range (206) and ETag /
+    If-None-Match (304) support.
+    """
+    try:
+        object_id = ObjectId(file_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid file_id (not a valid ObjectId)")
+    try:
+        grid_out = await grid_fs_bucket.open_download_stream(object_id)
+    except NoFile:
+        raise HTTPException(status_code=404, detail="File not found in GridFS")
+    return serve_grid_out(grid_out, headers)
+
+
+async def gridfs_response_by_name(grid_fs_bucket, filename: str, headers) -> Response:
+    """
+    Same as gridfs_response, for the latest revision of a GridFS filename.
+    """
+    try:
+        grid_out = await grid_fs_bucket.open_download_stream_by_name(filename)
+    except NoFile:
+        raise HTTPException(status_code=404, detail="File not found in GridFS")
+    return serve_grid_out(grid_out, headers)
+
+
+def serve_grid_out(grid_out, headers) -> Response:
+    """
+    Response for an opened GridFS file. GridFS files never change once
+    written, so the file's _id is a strong ETag.
+    """
+    etag = f'"{grid_out._id}"'
+    common = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate",
+    }
+    if grid_out.upload_date:
+        # pymongo returns naive UTC datetimes
+        uploaded = grid_out.upload_date.replace(tzinfo=timezone.utc)
+        common["Last-Modified"] = format_datetime(uploaded, usegmt=True)
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=common)
+
+    length = grid_out.length
+    byte_range = None
+    range_header = headers.get("range")
+    # If-Range: only honour the range if the client's copy is still current
+    if range_header and headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, length)
+        except ValueError:
+            return Response(status_code=416, headers={**common, "Content-Range": f"bytes */{length}"})
+
+    if byte_range is None:
+        start, end, status = 0, length - 1, 200
+    else:
+        (start, end), status = byte_range, 206
+        common["Content-Range"] = f"bytes {start}-{end}/{length}"
+    common["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        _stream(grid_out, start, end - start + 1),
+        status_code=status,
+        media_type=_content_type(grid_out),
+        headers=common,
+    )
@@ -1,33 +1,40 @@
 # main.py (monitoring_service)
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
 import asyncio
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import os
-from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+import redis.asyncio as redis
 
+from .backplane import Backplane
+from .connections import ConnectionManager
+from .crud import create_video, mark_processing_end, upsert_processing_start
 from .database import engine, SessionLocal
-from .models import Base, VideoStatusDB
-from .schema import VideoStatusEnum, VideoUpdate
+from .gridfs_http import gridfs_response, gridfs_response_by_name
+from .models import Base
+from .schema import VideoCreate, VideoEvent, VideoStatusEnum, VideoUpdate
 
 app = FastAPI(title="Monitoring Service with Embedded Download Links")
 
 # ------------------------------------------------------------------------------
 # Postgres Setup
 # ------------------------------------------------------------------------------
-Base.metadata.create_all(bind=engine)
+@app.on_event("startup")
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
-def get_db():
-    """Dependency that provides a SQLAlchemy session."""
-    db = SessionLocal()
-    try:
+@app.on_event("shutdown")
+async def dispose_engine():
+    await engine.dispose()
+
+async def get_db():
+    """Dependency that provides an async SQLAlchemy session."""
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # ------------------------------------------------------------------------------
 # Mongo / GridFS Setup
@@ -40,109 +47,141 @@ grid_fs_bucket = AsyncIOMotorGridFSBucket(mongo_db)
 # ------------------------------------------------------------------------------
 # WebSocket Tracking
 # ------------------------------------------------------------------------------
-connected_clients = []
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "64"))  # messages buffered per client before it's dropped
+connections = ConnectionManager(queue_size=WS_QUEUE_SIZE)
+
+# Events go through Redis pub/sub, so each replica delivers to its own sockets
+REDIS_HOST = os.getenv("REDIS_HOST", "redis-service")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "monitoring:video_events")
+redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+backplane = Backplane(redis_client, connections, channel=EVENTS_CHANNEL)
+
+@app.on_event("startup")
+async def start_backplane():
+    await backplane.start()
+
+@app.on_event("shutdown")
+async def stop_backplane():
+    await backplane.stop()
+    await redis_client.aclose()
 
 @app.websocket("/ws")
-async def ws_endpoint(websocket: WebSocket):
+async def ws_endpoint(websocket: WebSocket, user_id: str):
     """
-    WebSocket endpoint. The frontend connects here to receive real-time
-    updates when a video is fully processed.
+    WebSocket endpoint. The frontend connects here as /ws?user_id=<id> to
+    receive real-time updates when one of that user's videos is processed.
     """
-    await websocket.accept()
-    connected_clients.append(websocket)
-    print("[Monitoring] WebSocket client connected.")
+    client = await connections.connect(websocket, user_id)
+    print(f"[Monitoring] WebSocket client connected for user {user_id} ({len(connections)} connected).")
     try:
         while True:
             await websocket.receive_text()  # Keep the connection alive
     except WebSocketDisconnect:
-        print("[Monitoring] WebSocket client disconnected.")
-        if websocket in connected_clients:
-            connected_clients.remove(websocket)
+        print(f"[Monitoring] WebSocket client disconnected for user {user_id}.")
+    finally:
+        connections.disconnect(client)
 
-async def broadcast(message: dict):
+# ------------------------------------------------------------------------------
+# Download Endpoint (streams from GridFS)
+# ------------------------------------------------------------------------------
+@app.api_route("/download/{file_id}", methods=["GET", "HEAD"])
+async def download_file(file_id: str, request: Request):
     """
-    Broadcast a JSON-serializable dictionary to all connected WebSocket clients.
+    Retrieve a file (video or text) from GridFS by _id and return it, with
+    Range and ETag support so players can seek and browsers can cache.
     """
-    to_remove = []
-    for ws in connected_clients:
-        try:
-            await ws.send_json(message)
-        except:
-            to_remove.append(ws)
-    for ws in to_remove:
-        if ws in connected_clients:
-            connected_clients.remove(ws)
+    return await gridfs_response(grid_fs_bucket, file_id, request.headers)
 
-# ------------------------------------------------------------------------------
-# Helper: Parse Username from raw_video_id
-# ------------------------------------------------------------------------------
-def parse_username_from_videoid(raw_video_id: str) -> str:
+@app.api_route("/hls/{path:path}", methods=["GET", "HEAD"])
+async def hls_file(path: str, request: Request):
     """
-    If your raw_video_id looks like 'username_something', we parse 'username'
-    as the user name. If there's no underscore, we default to 'unknown'.
+    Serve HLS playlists and segments, stored in GridFS as hls/<video_id>/...
+    Playlists reference their variants and segments by relative path, so a
+    player pointed at /hls/<video_id>/master.m3u8 fetches everything from here.
     """
-    parts = raw_video_id.split("_", 1)
-    if parts:
-        return parts[0]
-    return "unknown"
+    return await gridfs_response_by_name(grid_fs_bucket, f"hls/{path}", request.headers)
 
 # ------------------------------------------------------------------------------
-# Download Endpoint (streams from GridFS)
+# Helper: video_processed message with download links
 # ------------------------------------------------------------------------------
-@app.get("/download/{file_id}")
-async def download_file(file_id: str):
+MONITORING_DOWNLOAD_BASE = "http://localhost:8002/download"
+MONITORING_BASE = "http://localhost:8002"
+
+def processed_message(video_id: str, db_video: dict, data: dict) -> dict:
     """
-    Retrieve a file (video or text) from GridFS by _id and return it.
+    The 'video_processed' event sent to the user's WebSocket clients, with
+    embedded /download/{file_id} (or /hls/...) links from *this* service.
+    `db_video` is the updated record, `data` the end event's fields.
     """
-    try:
-        object_id = ObjectId(file_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid file_id (not a valid ObjectId)")
+    # If you included "resolutions" in the request body, e.g. data["resolutions"]
+    resolutions_dict = data.get("resolutions") or {}
+    # Build "download_links" from resolution IDs
+    download_links = {}
+    for res_label, fid in resolutions_dict.items():
+        download_links[res_label] = f"{MONITORING_DOWNLOAD_BASE}/{fid}"
 
-    grid_out = await grid_fs_bucket.open_download_stream(object_id)
-    if not grid_out:
-        raise HTTPException(status_code=404, detail="File not found in GridFS")
+    # HLS output: link the playlists by path so their relative URIs resolve
+    hls_playlist = data.get("hls_playlist")
+    hls_master = None
+    if hls_playlist:
+        hls_master = f"{MONITORING_BASE}/{hls_playlist}"
+        hls_dir = hls_playlist.rsplit("/", 1)[0]
+        for res_label in resolutions_dict:
+            download_links[res_label] = f"{MONITORING_BASE}/{hls_dir}/{res_label}/index.m3u8"
 
-    return StreamingResponse(grid_out, media_type="application/octet-stream")
+    # Build link for transcript
+    transcript_id = data.get("transcription_id", "")
+    download_transcript = None
+    if transcript_id:
+        download_transcript = f"{MONITORING_DOWNLOAD_BASE}/{transcript_id}"
+
+    return {
+        "event": "video_processed",
+        "video_id": video_id,
+        "file_name": db_video["raw_video_id"],  # or something else
+        "transcript_file_id": db_video["transcription_id"],
+        "resolutions": resolutions_dict,  # raw IDs
+        "download_links": download_links,
+        "download_transcript": download_transcript,
+        "hls_master": hls_master,
+        "message": "Video fully processed. Ready to download."
+    }
+
+# ------------------------------------------------------------------------------
+# videos (new uploads)
+# ------------------------------------------------------------------------------
+@app.post("/videos")
+async def create_video_record(video: VideoCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Called by the upload service for every new upload. Creates the record
+    for raw_video_id with the uploader's user_id, which is who gets the
+    'video_processed' event later. A repeated call leaves the record as is.
+    """
+    created = await create_video(db, video.raw_video_id, video.user_id, utc_naive(video.upload_time))
+    await db.commit()
+    return {"video_id": video.raw_video_id, "created": created}
 
 # ------------------------------------------------------------------------------
 # video-processing-start
 # ------------------------------------------------------------------------------
 @app.post("/video-processing-start/{video_id}")
-def video_processing_start(video_id: str, db: Session = Depends(get_db)):
+async def video_processing_start(video_id: str, user_id: Optional[str] = None,
+                                 db: AsyncSession = Depends(get_db)):
     """
-    Called when video processing starts. We'll either find an existing record
-    or create a new one if none exists for raw_video_id = video_id.
-    Also parse the username from 'video_id' if you store the pattern 'username_something'.
+    Called when video processing starts. Creates the record for
+    raw_video_id = video_id, or marks an existing one as processing, in a
+    single upsert. `user_id` is the uploader; if it is not given, the record
+    keeps the user it was created with (see POST /videos).
     """
-    # Try to find existing row
-    db_video = db.query(VideoStatusDB).filter(VideoStatusDB.raw_video_id == video_id).first()
-
-    if not db_video:
-        # Create a new record
-        user_id = parse_username_from_videoid(video_id)
-        db_video = VideoStatusDB(
-            user_id=user_id,
-            raw_video_id=video_id,
-            status="uploaded",
-            video_processing_status="processing",
-            video_processing_start=datetime.utcnow(),
-            upload_time=datetime.utcnow(),
-        )
-        db.add(db_video)
-        db.commit()
-        db.refresh(db_video)
+    created = await upsert_processing_start(db, video_id, user_id)
+    await db.commit()
+    if created:
         return {
             "message": f"Created record & marked processing start for raw_video_id={video_id}",
             "video_id": video_id
         }
 
-    # Else, update existing
-    db_video.video_processing_status = "processing"
-    db_video.video_processing_start = datetime.utcnow()
-    db.commit()
-    db.refresh(db_video)
-
     return {
         "message": f"Video processing started (existing record updated) for raw_video_id={video_id}",
         "video_id": video_id
@@ -155,7 +194,7 @@ def video_processing_start(video_id: str, db: Session = Depends(get_db)):
 async def video_processing_end(
     video_id: str,
     updates: VideoUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Called when the video is fully processed.
@@ -167,66 +206,77 @@ async def video_processing_end(
         "status": "done"
       }
 
-    We'll set status=done, compute total time, then broadcast 
+    We'll set status=done, compute total time, then send the video's user
     a 'video_processed' event with embedded /download/{file_id} links (from *this* service).
     """
-    db_video = db.query(VideoStatusDB).filter(VideoStatusDB.raw_video_id == video_id).first()
+    # Mark the status as done, compute total time and store the ids, in one statement
+    data = updates.dict(exclude_unset=True)
+    db_video = await mark_processing_end(db, video_id, data)
     if not db_video:
         raise HTTPException(
             status_code=404,
             detail=f"No matching video record with raw_video_id={video_id}"
         )
+    await db.commit()
 
-    # Mark the status as done
-    db_video.status = "done"
-    db_video.video_processing_status = "done"
-    db_video.video_processing_end = datetime.utcnow()
-
-    # If we have a start time and an upload time, compute total
-    if db_video.upload_time and db_video.video_processing_end:
-        delta = db_video.video_processing_end - db_video.upload_time
-        db_video.total_processing_time = int(delta.total_seconds())
-
-    # Update fields from the VideoUpdate model
-    data = updates.dict(exclude_unset=True)
-    if "processed_video_id" in data:
-        db_video.processed_video_id = data["processed_video_id"]
-    if "transcription_id" in data:
-        db_video.transcription_id = data["transcription_id"]
-
-    db.commit()
-    db.refresh(db_video)
-
-    MONITORING_DOWNLOAD_BASE = "http://localhost:8002/download"
-
-    # If you included "resolutions" in the request body, e.g. data["resolutions"]
-    resolutions_dict = data.get("resolutions", {})
-    # Build "download_links" from resolution IDs
-    download_links = {}
-    for res_label, fid in resolutions_dict.items():
-        download_links[res_label] = f"{MONITORING_DOWNLOAD_BASE}/{fid}"
-
-    # Build link for transcript
-    transcript_id = data.get("transcription_id", "")
-    download_transcript = None
-    if transcript_id:
-        download_transcript = f"{MONITORING_DOWNLOAD_BASE}/{transcript_id}"
-
-    # Broadcast message
-    msg = {
-        "event": "video_processed",
-        "video_id": video_id,
-        "file_name": db_video.raw_video_id,  # or something else
-        "transcript_file_id": db_video.transcription_id,
-        "resolutions": resolutions_dict,  # raw IDs
-        "download_links": download_links,
-        "download_transcript": download_transcript,
-        "message": "Video fully processed. Ready to download."
-    }
-    await broadcast(msg)
+    msg = processed_message(video_id, db_video, data)
+    await backplane.publish(db_video["user_id"], msg)
 
     return {
         "message": "Video processing ended",
         "video_id": video_id,
         "status": "done"
     }
+
+# ------------------------------------------------------------------------------
+# events (batched start/end transitions)
+# ------------------------------------------------------------------------------
+MAX_EVENTS_PER_BATCH = int(os.getenv("MAX_EVENTS_PER_BATCH", "1000"))
+
+def utc_naive(at: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC (datetime.utcnow())."""
+    if at is None or at.tzinfo is None:
+        return at
+    return at.astimezone(timezone.utc).replace(tzinfo=None)
+
+@app.post("/events")
+async def ingest_events(events: List[VideoEvent], db: AsyncSession = Depends(get_db)):
+    """
+    Apply a batch of start/end transitions, in order, in one transaction:
+      [
+        {"type": "start", "video_id": "...", "user_id": "...", "at": "2024-01-01T12:00:00"},
+        {"type": "end", "video_id": "...", "at": "...", "transcription_id": "...",
+         "resolutions": {"720p": "<fileID720>"}},
+        ...
+      ]
+    Each transition takes effect at its "at" time (default: now), so batching
+    on the sender doesn't skew processing times. End events for unknown
+    videos are reported as "not_found" without failing the batch. Once the
+    batch is committed, each finished video's user gets its 'video_processed'
+    event, as with /video-processing-end.
+    """
+    if len(events) > MAX_EVENTS_PER_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_EVENTS_PER_BATCH} events per batch, got {len(events)}"
+        )
+
+    results, processed = [], []
+    for event in events:
+        if event.type == "start":
+            created = await upsert_processing_start(db, event.video_id, event.user_id, utc_naive(event.at))
+            results.append({"video_id": event.video_id, "type": "start",
+                            "status": "created" if created else "updated"})
+            continue
+        data = event.dict(exclude_unset=True, exclude={"type", "video_id", "user_id", "at"})
+        db_video = await mark_processing_end(db, event.video_id, data, utc_naive(event.at))
+        results.append({"video_id": event.video_id, "type": "end",
+                        "status": "done" if db_video else "not_found"})
+        if db_video:
+            processed.append((db_video["user_id"], processed_message(event.video_id, db_video, data)))
+    await db.commit()
+
+    for user_id, msg in processed:
+        await backplane.publish(user_id, msg)
+    print(f"[Monitoring] Applied {len(events)} events ({len(processed)} videos done).")
+    return {"applied": len(events), "results": results}
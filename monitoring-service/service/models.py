@@ -11,7 +11,7 @@ class VideoStatusDB(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, index=True)
 
-    raw_video_id = Column(String, nullable=True)
+    raw_video_id = Column(String, nullable=True, unique=True, index=True)  # one record per upload
     processed_video_id = Column(String, nullable=True)
     transcription_id = Column(String, nullable=True)
 
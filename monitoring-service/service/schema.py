@@ -1,6 +1,6 @@
 # schema.py
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Literal, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -12,6 +12,8 @@ class VideoStatusEnum(str, Enum):
 class VideoUpdate(BaseModel):
     processed_video_id: Optional[str] = None
     transcription_id: Optional[str] = None
+    resolutions: Optional[Dict[str, str]] = None  # resolution label -> GridFS file ID
+    hls_playlist: Optional[str] = None  # GridFS name of the HLS master playlist, e.g. "hls/<id>/master.m3u8"
 
     status: Optional[VideoStatusEnum] = None
     video_processing_status: Optional[str] = None
@@ -24,3 +26,22 @@ class VideoUpdate(BaseModel):
 
     class Config:
         orm_mode = True
+
+class VideoCreate(BaseModel):
+    """
+    A new upload, as announced by the upload service. Its other fields are
+    ignored: the record starts out as "uploaded".
+    """
+    user_id: str
+    raw_video_id: str
+    upload_time: Optional[datetime] = None
+
+class VideoEvent(VideoUpdate):
+    """
+    One status transition in a POST /events batch. End events carry the
+    same fields as a /video-processing-end body.
+    """
+    type: Literal["start", "end"]
+    video_id: str
+    user_id: Optional[str] = None  # the uploader, on start events
+    at: Optional[datetime] = None  # when it happened (default: when it's applied)
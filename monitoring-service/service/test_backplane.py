@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+
+import fakeredis
+import httpx
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/monitoring.db")
+
+from . import main
+from .backplane import Backplane
+from .connections import ConnectionManager
+from .test_connections import FakeWebSocket
+
+
+async def replica(server: fakeredis.FakeServer) -> Backplane:
+    """
+    One monitoring-service replica's delivery side: its own connections and
+    Redis client, on the shared (fake) Redis server.
+    """
+    backplane = Backplane(fakeredis.FakeAsyncRedis(server=server), ConnectionManager(), retry_seconds=0.01)
+    await backplane.start()
+    await backplane.wait_subscribed()
+    return backplane
+
+
+def test_event_published_on_one_replica_reaches_sockets_on_every_replica():
+    async def run():
+        server = fakeredis.FakeServer()
+        a, b = await replica(server), await replica(server)
+        alice_a, alice_b, bob_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await a.connections.connect(alice_a, "alice")
+        await b.connections.connect(alice_b, "alice")
+        await b.connections.connect(bob_b, "bob")
+
+        await a.publish("alice", {"video_id": "alice_clip.mp4"})
+        await asyncio.sleep(0.1)
+        await a.stop()
+        await b.stop()
+        return alice_a, alice_b, bob_b
+    alice_a, alice_b, bob_b = asyncio.run(run())
+    assert alice_a.sent == alice_b.sent == [{"video_id": "alice_clip.mp4"}]
+    assert bob_b.sent == []
+
+
+def test_publish_delivers_locally_when_redis_is_down():
+    async def run():
+        server = fakeredis.FakeServer()
+        a = await replica(server)
+        alice = FakeWebSocket()
+        await a.connections.connect(alice, "alice")
+        server.connected = False
+        await a.publish("alice", {"video_id": "alice_clip.mp4"})
+        await asyncio.sleep(0.05)
+        await a.stop()
+        return alice
+    alice = asyncio.run(run())
+    assert alice.sent == [{"video_id": "alice_clip.mp4"}]
+
+
+def test_malformed_events_are_ignored():
+    async def run():
+        server = fakeredis.FakeServer()
+        a = await replica(server)
+        alice = FakeWebSocket()
+        await a.connections.connect(alice, "alice")
+        publisher = fakeredis.FakeAsyncRedis(server=server)
+        await publisher.publish(a.channel, "not json")
+        await a.publish("alice", {"video_id": "alice_clip.mp4"})
+        await asyncio.sleep(0.1)
+        await a.stop()
+        return alice
+    alice = asyncio.run(run())
+    assert alice.sent == [{"video_id": "alice_clip.mp4"}]
+
+
+def test_end_event_handled_by_the_app_reaches_a_socket_on_another_replica(monkeypatch):
+    async def run():
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(main.backplane, "client", fakeredis.FakeAsyncRedis(server=server))
+        other = await replica(server)
+        carol = FakeWebSocket()
+        await other.connections.connect(carol, "carol")
+
+        await main.create_tables()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/videos", json={"user_id": "carol", "raw_video_id": "65f1c0ffee0000000000ca01"})
+            await client.post("/video-processing-start/65f1c0ffee0000000000ca01")
+            await client.post("/video-processing-end/65f1c0ffee0000000000ca01", json={"resolutions": {"720p": "f720"}})
+        await asyncio.sleep(0.1)
+        await other.stop()
+        return carol
+    carol = asyncio.run(run())
+    assert len(carol.sent) == 1
+    assert carol.sent[0]["event"] == "video_processed"
+    assert carol.sent[0]["video_id"] == "65f1c0ffee0000000000ca01"
+    assert carol.sent[0]["download_links"] == {"720p": "http://localhost:8002/download/f720"}
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from .connections import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_messages_go_only_to_the_users_connections():
+    async def run():
+        manager = ConnectionManager()
+        alice1, alice2, bob = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(alice1, "alice")
+        await manager.connect(alice2, "alice")
+        await manager.connect(bob, "bob")
+        assert manager.send_to_user("alice", {"video_id": "a"}) == 2
+        assert manager.send_to_user("carol", {"video_id": "c"}) == 0
+        await asyncio.sleep(0.01)
+        return alice1, alice2, bob
+    alice1, alice2, bob = asyncio.run(run())
+    assert alice1.sent == alice2.sent == [{"video_id": "a"}]
+    assert bob.sent == []
+
+
+def test_slow_client_does_not_delay_others_and_is_dropped_on_overflow():
+    async def run():
+        manager = ConnectionManager(queue_size=2)
+        slow, fast = FakeWebSocket(delay=10), FakeWebSocket()
+        await manager.connect(slow, "alice")
+        await manager.connect(fast, "alice")
+        for i in range(4):
+            manager.send_to_user("alice", {"n": i})
+            await asyncio.sleep(0.01)
+        return manager, slow, fast
+    manager, slow, fast = asyncio.run(run())
+    assert [m["n"] for m in fast.sent] == [0, 1, 2, 3]
+    assert slow.sent == []
+    assert slow.closed_with == 1013
+    assert manager.dropped == 1 and len(manager) == 1
+
+
+def test_disconnect_unregisters_user():
+    async def run():
+        manager = ConnectionManager()
+        client = await manager.connect(FakeWebSocket(), "alice")
+        manager.disconnect(client)
+        manager.disconnect(client)
+        return manager
+    manager = asyncio.run(run())
+    assert manager.clients == {} and len(manager) == 0
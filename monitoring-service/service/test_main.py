@@ -0,0 +1,123 @@
+import asyncio
+import os
+import tempfile
+
+# SQLite file stand-in for Postgres
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/monitoring.db"
+
+import httpx
+from sqlalchemy import func, select
+
+from .database import SessionLocal
+from .main import app, create_tables
+from .models import VideoStatusDB
+
+# Upload ids are GridFS ObjectIds: they say nothing about the user
+VIDEO_A, VIDEO_B, VIDEO_C, DAVE_A, DAVE_B, UNKNOWN = (f"65f1c0ffee00000000000{n:03d}" for n in range(1, 7))
+
+
+def post_all(*requests):
+    async def run():
+        await create_tables()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post(path, json=body) for path, body in requests]
+    return asyncio.run(run())
+
+
+def fetch(video_id):
+    async def run():
+        async with SessionLocal() as db:
+            rows = await db.execute(select(VideoStatusDB).where(VideoStatusDB.raw_video_id == video_id))
+            count = await db.scalar(
+                select(func.count()).select_from(VideoStatusDB).where(VideoStatusDB.raw_video_id == video_id)
+            )
+            return rows.scalars().first(), count
+    return asyncio.run(run())
+
+
+def test_upload_then_start_then_end_updates_one_record():
+    # the upload service's payload has more fields than the record needs
+    upload = {"user_id": "alice", "raw_video_id": VIDEO_A, "status": "created",
+              "upload_time": "2024-01-01T12:00:00", "additonal_details": {"filename": "alice_clip.mp4"}}
+    created, again, start, restart, end = post_all(
+        ("/videos", upload),
+        ("/videos", upload),
+        (f"/video-processing-start/{VIDEO_A}", None),
+        (f"/video-processing-start/{VIDEO_A}", None),
+        (f"/video-processing-end/{VIDEO_A}", {"processed_video_id": "p1", "transcription_id": "t1"}),
+    )
+    assert created.json()["created"] is True and again.json()["created"] is False
+    assert start.status_code == restart.status_code == end.status_code == 200
+    assert "existing record" in start.json()["message"]
+    assert end.json()["status"] == "done"
+
+    video, count = fetch(VIDEO_A)
+    assert count == 1
+    assert video.user_id == "alice"  # from the upload, not parsed from the id
+    assert (video.status, video.processed_video_id, video.transcription_id) == ("done", "p1", "t1")
+    assert video.total_processing_time is not None
+
+
+def test_start_with_user_id_creates_the_record_for_that_user():
+    (start,) = post_all((f"/video-processing-start/{VIDEO_B}?user_id=erin", None))
+    assert "Created record" in start.json()["message"]
+    assert fetch(VIDEO_B)[0].user_id == "erin"
+
+
+def test_end_for_unknown_video_is_404():
+    (end,) = post_all((f"/video-processing-end/{UNKNOWN}", {"processed_video_id": "p1"}))
+    assert end.status_code == 404
+
+
+def test_concurrent_starts_create_one_record():
+    async def run():
+        await create_tables()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.post(f"/video-processing-start/{VIDEO_C}", params={"user_id": "bob"}) for _ in range(20))
+            )
+    responses = asyncio.run(run())
+    assert all(r.status_code == 200 for r in responses)
+    assert sum("Created record" in r.json()["message"] for r in responses) == 1
+    video, count = fetch(VIDEO_C)
+    assert count == 1 and video.user_id == "bob"
+
+
+def test_upserts_compile_for_postgres():
+    from datetime import datetime
+    from sqlalchemy.dialects import postgresql
+
+    from .crud import _INSERTS, _seconds_since
+
+    stmt = _INSERTS["postgresql"](VideoStatusDB).values(raw_video_id="x").on_conflict_do_update(
+        index_elements=[VideoStatusDB.raw_video_id], set_={"video_processing_status": "processing"}
+    )
+    assert "ON CONFLICT (raw_video_id) DO UPDATE" in str(stmt.compile(dialect=postgresql.dialect()))
+    elapsed = _seconds_since(VideoStatusDB.upload_time, datetime.utcnow(), "postgresql")
+    assert "EXTRACT(epoch FROM" in str(elapsed.compile(dialect=postgresql.dialect()))
+
+
+def test_events_batch_is_applied_in_order_in_one_request():
+    (resp,) = post_all(("/events", [
+        {"type": "start", "video_id": DAVE_A, "user_id": "dave", "at": "2024-01-01T12:00:00"},
+        {"type": "start", "video_id": DAVE_B, "user_id": "dave", "at": "2024-01-01T12:00:01"},
+        {"type": "end", "video_id": DAVE_A, "at": "2024-01-01T12:01:30+00:00",
+         "transcription_id": "t1", "resolutions": {"720p": "f720"}},
+        {"type": "end", "video_id": UNKNOWN},
+    ]))
+    assert resp.status_code == 200
+    assert resp.json()["applied"] == 4
+    assert [r["status"] for r in resp.json()["results"]] == ["created", "created", "done", "not_found"]
+
+    video_a, _ = fetch(DAVE_A)
+    assert (video_a.user_id, video_a.status, video_a.transcription_id) == ("dave", "done", "t1")
+    assert video_a.total_processing_time == 90  # from the events' own timestamps
+    video_b, _ = fetch(DAVE_B)
+    assert video_b.video_processing_status == "processing"
+
+
+def test_events_batch_rejects_unknown_types():
+    (resp,) = post_all(("/events", [{"type": "paused", "video_id": DAVE_A}]))
+    assert resp.status_code == 422
@@ -0,0 +1,115 @@
+"""
+Compare CPU time and wall time of the encode modes on a synthetic clip.
+
+Run from the video-processing-service directory (ffmpeg must be on PATH):
+
+    python -m benchmarks.bench_encode_modes --duration 20 --repeat 3
+"""
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+from service.config import settings
+from service.encoder import build_rendition_args, build_single_pass_args, rendition_filename
+from service.ladder import plan_ladder
+from service.segmented import encode_segmented
+from service.worker_pool import available_cpus
+
+# The configured ladder (LADDER / PRESET / QUALITY), nothing skipped
+RENDITIONS, _ = plan_ladder(settings.ladder, None, settings.preset, settings.quality)
+
+
+def make_test_clip(path: str, duration: int, size: str):
+    """
+    Generate a test clip with ffmpeg's testsrc video and a sine tone audio track.
+    """
+    subprocess.check_call([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=duration={duration}:size={size}:rate=30",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", "libx264", "-c:a", "aac", "-shortest",
+        path,
+    ])
+
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_per_process(clip: str, workdir: str):
+    """
+    One ffmpeg per rendition, all started together (like create_video).
+    """
+    procs = []
+    for res_label, rendition in RENDITIONS.items():
+        out = os.path.join(workdir, rendition_filename("clip.mp4", res_label))
+        args = build_rendition_args(clip, rendition, out)
+        procs.append(subprocess.Popen(args[:1] + ["-loglevel", "error"] + args[1:]))
+    for proc in procs:
+        proc.wait()
+
+
+def run_single_pass(clip: str, workdir: str):
+    """
+    One ffmpeg with a split filter graph (like create_videos_single_pass).
+    """
+    outputs = {
+        res_label: (rendition, os.path.join(workdir, rendition_filename("clip.mp4", res_label)))
+        for res_label, rendition in RENDITIONS.items()
+    }
+    args = build_single_pass_args(clip, outputs)
+    subprocess.check_call(args[:1] + ["-loglevel", "error"] + args[1:])
+
+
+def run_segmented(clip: str, workdir: str):
+    """
+    Split-encode-concat in 10 s segments, one ffmpeg per CPU.
+    """
+    results = encode_segmented(os.path.join(workdir, "clip.mp4"), clip, RENDITIONS, 10, available_cpus())
+    assert all(r.ok for r in results.values())
+
+
+def measure(fn, clip: str, workdir: str, repeat: int):
+    wall, cpu = [], []
+    for _ in range(repeat):
+        cpu_start = children_cpu_seconds()
+        wall_start = time.perf_counter()
+        fn(clip, workdir)
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(children_cpu_seconds() - cpu_start)
+    return min(wall), min(cpu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=int, default=20, help="clip length in seconds")
+    parser.add_argument("--size", default="1920x1080", help="source frame size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        clip = os.path.join(workdir, "source.mp4")
+        make_test_clip(clip, args.duration, args.size)
+
+        results = {
+            "per_process": measure(run_per_process, clip, workdir, args.repeat),
+            "single_pass": measure(run_single_pass, clip, workdir, args.repeat),
+            "segmented": measure(run_segmented, clip, workdir, args.repeat),
+        }
+
+    print(f"source: testsrc {args.size}, {args.duration}s, renditions: {', '.join(RENDITIONS)} (preset {settings.preset})")
+    print(f"{'mode':<12} {'wall (s)':>10} {'cpu (s)':>10}")
+    for mode, (wall, cpu) in results.items():
+        print(f"{mode:<12} {wall:>10.2f} {cpu:>10.2f}")
+    base_cpu = results["per_process"][1]
+    if base_cpu:
+        saved = 1 - results["single_pass"][1] / base_cpu
+        print(f"single_pass saves {saved:.0%} CPU-seconds per upload")
+
+
+if __name__ == "__main__":
+    main()
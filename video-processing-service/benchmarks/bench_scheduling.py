@@ -0,0 +1,119 @@
+"""
+Completion latency of the fifo, sjf and wfq scheduling policies.
+
+Simulates a worker pool fed with a synthetic upload stream: mostly short
+clips, some medium videos and a few long recordings (mostly from a handful
+of heavy users), arriving as a Poisson process at the given load. A job's
+service time is its estimated cost. As in the service, the scheduler holds
+at most --max-queue waiting jobs (MAX_QUEUE, by default 4 per worker); later
+arrivals wait in the stream, in arrival order, until it has room (0: no
+bound). Reports
+p50/p95/p99 completion latency (arrival to finish) overall and for short and
+long jobs. Run from the video-processing-service directory:
+
+    python -m benchmarks.bench_scheduling --jobs 20000 --workers 4 --load 0.9 --max-queue 16
+"""
+import argparse
+import heapq
+import random
+from collections import deque
+
+from service.scheduler import POLICIES, Scheduler, ScheduledJob
+
+SHORT, LONG = 120, 1800  # cost thresholds for the short/long latency columns
+
+
+def synthetic_jobs(n: int, workers: int, load: float, users: int, seed: int):
+    """
+    (arrival time, cost, user_id) tuples, sorted by arrival.
+    """
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.80:
+            cost, user = rng.lognormvariate(3.5, 0.6), rng.randrange(users)  # ~30 s clips
+        elif kind < 0.97:
+            cost, user = rng.uniform(300, 1200), rng.randrange(users)  # 5-20 min videos
+        else:
+            cost, user = rng.uniform(3600, 7200), rng.randrange(3)  # 1-2 h recordings, heavy users
+        jobs.append((cost, f"user{user}"))
+
+    mean_cost = sum(cost for cost, _ in jobs) / n
+    rate = load * workers / mean_cost
+    now, timed = 0.0, []
+    for cost, user in jobs:
+        now += rng.expovariate(rate)
+        timed.append((now, cost, user))
+    return timed
+
+
+def simulate(policy: str, jobs, workers: int, aging: float, max_queue: int = 0):
+    """
+    Run the jobs through a Scheduler holding at most `max_queue` of them
+    (0: all) on `workers` simulated workers and return (cost, latency) per job.
+    """
+    now = 0.0
+    scheduler = Scheduler(policy, aging=aging, clock=lambda: now)
+    stream = deque()  # arrived, not yet read by the listener
+    running = []  # heap of (finish time, seq)
+    arrivals = {}
+    results = []
+    i = 0
+    while i < len(jobs) or running or len(scheduler) or stream:
+        next_arrival = jobs[i][0] if i < len(jobs) else float("inf")
+        next_finish = running[0][0] if running else float("inf")
+        if next_arrival <= next_finish:
+            now = next_arrival
+            _, cost, user = jobs[i]
+            stream.append(ScheduledJob(str(i), {}, cost, user))
+            arrivals[str(i)] = (now, cost)
+            i += 1
+        else:
+            now, _ = heapq.heappop(running)
+        while stream and (not max_queue or len(scheduler) < max_queue):
+            scheduler.push(stream.popleft())
+        while len(scheduler) and len(running) < workers:
+            job = scheduler.pop()
+            heapq.heappush(running, (now + job.cost, job.msg_id))
+            arrived, cost = arrivals.pop(job.msg_id)
+            results.append((cost, now + job.cost - arrived))
+            if stream:
+                scheduler.push(stream.popleft())
+    return results
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--load", type=float, default=0.9, help="offered load as a fraction of capacity")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--aging", type=float, default=0.25, help="sjf aging, cost-seconds per second waited")
+    parser.add_argument("--max-queue", type=int, default=16, help="waiting jobs the scheduler holds (0: no bound)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    jobs = synthetic_jobs(args.jobs, args.workers, args.load, args.users, args.seed)
+    print(f"{args.jobs} jobs, {args.workers} workers, load {args.load}, "
+          f"max queue {args.max_queue or 'unbounded'}, latency in seconds")
+    print(f"{'policy':<6} {'p50':>8} {'p95':>8} {'p99':>8} {'short p95':>10} {'long p95':>10} {'max':>8}")
+    for policy in POLICIES:
+        results = simulate(policy, jobs, args.workers, args.aging, args.max_queue)
+        latency = [lat for _, lat in results]
+        short = [lat for cost, lat in results if cost < SHORT]
+        long = [lat for cost, lat in results if cost >= LONG]
+        print(f"{policy:<6} {percentile(latency, 50):>8.0f} {percentile(latency, 95):>8.0f} "
+              f"{percentile(latency, 99):>8.0f} {percentile(short, 95):>10.0f} "
+              f"{percentile(long, 95):>10.0f} {max(latency):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
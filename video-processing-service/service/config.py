@@ -1,10 +1,78 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
+
+class Rendition(BaseModel):
+    """
+    One rung of the encoding ladder. Width follows the source aspect ratio.
+    """
+    height: int
+    preset: Optional[str] = None  # libx264 preset, defaults to settings.preset
+    crf: Optional[int] = None  # defaults to settings.quality
+    maxrate: Optional[str] = None  # e.g. "3M"; caps peaks of the CRF encode (bufsize = 2x)
+
+
 class Settings(BaseSettings):
     redis_host: str = "redis-service"
     redis_port: int = 6379
-    redis_channel: str = "video_uploads"
-    quality: int = 30
+    redis_channel: str = "video_uploads"  # Redis Stream the upload service adds jobs to
+    redis_group: str = "video-processing"
+    # A pending job whose consumer hasn't heartbeated for this long is
+    # redelivered to another consumer; after max_deliveries it is dead-lettered.
+    claim_idle_ms: int = 60_000
+    max_deliveries: int = 3
+    # Encoding ladder, e.g. LADDER='{"1080p": {"height": 1080, "crf": 22, "maxrate": "5M"}}'.
+    # Rungs taller than the source are skipped rather than upscaled.
+    ladder: Dict[str, Rendition] = {
+        "720p": Rendition(height=720, crf=23, maxrate="3M"),
+        "480p": Rendition(height=480, crf=26, maxrate="1500k"),
+    }
+    preset: str = "veryfast"  # default libx264 preset: faster presets trade quality for throughput
+    quality: int = 30  # default CRF for rungs without one (lower = better)
+    # "single_pass": one ffmpeg run decodes once and writes every rendition
+    # "per_process": one ffmpeg process (and one full decode) per rendition
+    encode_mode: str = "single_pass"
+    # .mp4 renditions of videos at least segment_min_seconds long are encoded
+    # split-encode-concat: cut at keyframes into ~segment_seconds pieces,
+    # encoded segment_workers at a time (0 = this worker's share of the CPUs,
+    # available CPUs / pool size) and joined losslessly. 0 (default) disables.
+    segment_min_seconds: int = 0
+    segment_seconds: int = 60
+    segment_workers: int = 0
+    # "mp4": one progressive .mp4 per resolution
+    # "hls": HLS segments per resolution plus a master playlist, served by the
+    #        monitoring service under /hls/<video_id>/master.m3u8
+    output_format: str = "mp4"
+    hls_segment_seconds: int = 4
+    # Worker pool: max_workers > 0 fixes the pool size, otherwise it is
+    # workers_per_cpu * available CPUs (at least 1). max_queue bounds the jobs
+    # this replica reads ahead and holds (heartbeated) while they wait for a
+    # free worker, i.e. the window schedule_policy reorders; 0 means
+    # queue_per_worker per pool worker. Beyond that the listener stops taking
+    # new ones, and they stay in the stream for other replicas.
+    max_workers: int = 0
+    workers_per_cpu: float = 0.5
+    max_queue: int = 0
+    queue_per_worker: int = 4
+    # Order in which waiting jobs go to idle workers (see service/scheduler.py):
+    # "fifo" arrival order, "sjf" shortest estimated job first (cost = probed
+    # duration weighted by frame area) with schedule_aging cost-seconds taken
+    # off per second waited, or "wfq" weighted fair queueing across user_id
+    # with user_weights (default weight 1).
+    schedule_policy: str = "sjf"
+    schedule_aging: float = 0.25
+    user_weights: Dict[str, float] = {}
+    http_port: int = 8000
+    # Threads that probe newly read jobs (over /download) before they are
+    # scheduled, so a slow probe never holds up the listener's heartbeats.
+    probe_workers: int = 4
+    # Start/end events for the monitoring service are sent in batches to its
+    # POST /events: when monitoring_batch_size are buffered or
+    # monitoring_flush_seconds after the last send, over one keep-alive session.
+    monitoring_batch_size: int = 50
+    monitoring_flush_seconds: float = 1.0
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,143 @@
+import os
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from .config import Rendition
+from .ladder import codec_args, scale_filter
+
+
+@dataclass
+class RenditionResult:
+    """
+    Outcome of encoding one rendition, handed straight back to process_video.
+    """
+    resolution: str
+    ok: bool
+    path: str = ""
+    error: str = ""
+    encode_seconds: float = 0.0
+    file_id: str = ""  # set once the output is uploaded to GridFS
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "file_id": self.file_id,
+            "error": self.error,
+            "encode_seconds": round(self.encode_seconds, 3),
+        }
+
+
+# ------------------------------------------------------------------------------
+# FFmpeg argument builders
+# ------------------------------------------------------------------------------
+def _remove_partial(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def rendition_filename(file_name: str, resolution: str) -> str:
+    """
+    Output file name for one rendition, e.g. 'user_clip_720p.mp4'.
+    """
+    return f"{os.path.splitext(file_name)[0]}_{resolution}.mp4"
+
+
+def build_rendition_args(temp_path: str, rendition: Rendition, out_filename: str) -> List[str]:
+    """
+    ffmpeg args for a single rendition (one full decode per output).
+    """
+    return [
+        "ffmpeg", "-y",
+        "-i", temp_path,
+        "-vf", scale_filter(rendition),
+        *codec_args(rendition),
+        "-c:a", "aac",
+        out_filename
+    ]
+
+
+def build_single_pass_args(temp_path: str, outputs: Dict[str, Tuple[Rendition, str]]) -> List[str]:
+    """
+    ffmpeg args that decode the input once and write every rendition.
+
+    `outputs` maps a resolution label to (rendition, out_filename). The decoded
+    video is fanned out with a `split` filter and each branch is scaled and
+    encoded to its own file; the audio stream (if any) is mapped into each output.
+    """
+    labels = list(outputs.keys())
+    split = f"[0:v]split={len(labels)}" + "".join(f"[v{i}]" for i in range(len(labels)))
+    scales = [
+        f"[v{i}]{scale_filter(outputs[label][0])}[out{i}]"
+        for i, label in enumerate(labels)
+    ]
+
+    ff_args = [
+        "ffmpeg", "-y",
+        "-i", temp_path,
+        "-filter_complex", ";".join([split] + scales),
+    ]
+    for i, label in enumerate(labels):
+        ff_args += [
+            "-map", f"[out{i}]",
+            "-map", "0:a?",
+            *codec_args(outputs[label][0]),
+            "-c:a", "aac",
+            outputs[label][1],
+        ]
+    return ff_args
+
+
+# ------------------------------------------------------------------------------
+# Encoders
+# ------------------------------------------------------------------------------
+def encode_rendition(
+    file_name: str,
+    temp_path: str,
+    resolution: str,
+    rendition: Rendition,
+) -> RenditionResult:
+    """
+    Run one ffmpeg process for a single rendition.
+    """
+    out_filename = rendition_filename(file_name, resolution)
+    start = time.perf_counter()
+    ret = subprocess.call(build_rendition_args(temp_path, rendition, out_filename))
+    elapsed = time.perf_counter() - start
+
+    if ret == 0 and os.path.exists(out_filename):
+        return RenditionResult(resolution, True, path=out_filename, encode_seconds=elapsed)
+    _remove_partial(out_filename)
+    return RenditionResult(resolution, False, error=f"ffmpeg exited with {ret}", encode_seconds=elapsed)
+
+
+def encode_single_pass(
+    file_name: str,
+    temp_path: str,
+    renditions: Dict[str, Rendition],
+) -> Dict[str, RenditionResult]:
+    """
+    Run one ffmpeg process for all renditions. Every rendition reports the
+    elapsed time of that shared run.
+    """
+    outputs = {
+        res_label: (rendition, rendition_filename(file_name, res_label))
+        for res_label, rendition in renditions.items()
+    }
+    start = time.perf_counter()
+    ret = subprocess.call(build_single_pass_args(temp_path, outputs))
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for res_label, (_, out_filename) in outputs.items():
+        if ret == 0 and os.path.exists(out_filename):
+            results[res_label] = RenditionResult(res_label, True, path=out_filename, encode_seconds=elapsed)
+        else:
+            _remove_partial(out_filename)
+            results[res_label] = RenditionResult(
+                res_label, False, error=f"ffmpeg exited with {ret}", encode_seconds=elapsed
+            )
+    return results
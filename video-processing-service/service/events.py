@@ -0,0 +1,114 @@
+import atexit
+import threading
+from datetime import datetime
+from typing import List
+
+import requests
+
+
+class EventEmitter:
+    """
+    Buffered sender of status events to the monitoring service's POST /events.
+
+    emit() only appends to a buffer. A background thread posts the buffer as
+    one batch when it holds `max_batch` events or `flush_seconds` after the
+    last send, whichever comes first, over one pooled keep-alive session. Each
+    event is stamped when emitted, so batching doesn't delay its recorded
+    time. Batches that fail on a connection error or 5xx are retried with the
+    next one; at most `max_buffer` events are kept, dropping the oldest.
+    """
+
+    def __init__(self, url: str, max_batch: int = 50, flush_seconds: float = 1.0,
+                 max_buffer: int = 10_000, timeout: float = 10.0, session: requests.Session | None = None):
+        self.url = url
+        self.max_batch = max_batch
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.sent = 0
+        self.dropped = 0
+        self._buffer: List[dict] = []
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def emit(self, event_type: str, video_id: str, **fields):
+        """
+        Queue one transition ("start" or "end"); `fields` are the end event's
+        /video-processing-end fields.
+        """
+        event = {"type": event_type, "video_id": video_id, "at": datetime.utcnow().isoformat(), **fields}
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-emitter", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._buffer.append(event)
+            if len(self._buffer) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self) -> bool:
+        """
+        Send everything buffered now, in batches of at most max_batch. Returns
+        False if a batch couldn't be delivered (it stays buffered for a retry).
+        """
+        with self._send_lock:
+            while True:
+                with self._cond:
+                    batch = self._buffer[:self.max_batch]
+                    del self._buffer[:self.max_batch]
+                if not batch:
+                    return True
+                if not self._send(batch):
+                    with self._cond:
+                        self._buffer[:0] = batch
+                        overflow = len(self._buffer) - self.max_buffer
+                        if overflow > 0:
+                            del self._buffer[:overflow]
+                            self.dropped += overflow
+                            print(f"[EventEmitter] Buffer full, dropped {overflow} oldest events")
+                    return False
+
+    def close(self):
+        """
+        Stop the background thread and send what's left.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(self.timeout)
+        self.flush()
+
+    def _send(self, batch: List[dict]) -> bool:
+        """
+        Post one batch. Returns False if it should be retried.
+        """
+        try:
+            resp = self.session.post(self.url, json=batch, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"[EventEmitter] Could not send {len(batch)} events: {e}")
+            return False
+        if resp.status_code >= 500:
+            print(f"[EventEmitter] Monitoring service error {resp.status_code}, will retry {len(batch)} events")
+            return False
+        if resp.status_code != 200:
+            # a client error won't go away on retry
+            print(f"[EventEmitter] Monitoring service rejected {len(batch)} events: {resp.status_code} {resp.text}")
+            self.dropped += len(batch)
+            return True
+        self.sent += len(batch)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._buffer) >= self.max_batch,
+                                    timeout=self.flush_seconds)
+                if self._closed:
+                    return
+            if not self.flush():
+                with self._cond:  # back off before retrying, even with a full batch waiting
+                    self._cond.wait(self.flush_seconds)
@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+from bson import ObjectId
+
+
+async def download_to_file(grid_fs_bucket, file_id: str, suffix: str = ".mp4") -> str:
+    """
+    Stream a GridFS file to a new temp file one chunk at a time and return its
+    path. Only a single GridFS chunk (255 KB by default) is held in memory at
+    once. The caller owns the file and must remove it.
+    """
+    grid_out = await grid_fs_bucket.open_download_stream(ObjectId(file_id))
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        tmp_path = tmp.name
+        try:
+            while True:
+                chunk = await grid_out.readchunk()
+                if not chunk:
+                    break
+                tmp.write(chunk)
+        except Exception:
+            tmp.close()
+            os.remove(tmp_path)
+            raise
+    return tmp_path
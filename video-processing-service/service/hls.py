@@ -0,0 +1,127 @@
+import os
+import shutil
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import Rendition
+from .encoder import RenditionResult
+from .ladder import codec_args, scale_filter
+
+MASTER_PLAYLIST = "master.m3u8"
+VARIANT_PLAYLIST = "index.m3u8"
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+
+def has_audio(path: str) -> bool:
+    """
+    Whether the input has an audio stream (ffmpeg lists the streams on stderr).
+    """
+    proc = subprocess.run(["ffmpeg", "-hide_banner", "-i", path], capture_output=True, text=True)
+    return "Audio:" in proc.stderr
+
+
+def hls_output_dir(file_name: str) -> str:
+    """
+    Local directory for one video's HLS output, e.g. 'user_clip_hls'.
+    """
+    return f"{os.path.splitext(file_name)[0]}_hls"
+
+
+def build_hls_args(
+    temp_path: str,
+    renditions: Dict[str, Rendition],
+    out_dir: str,
+    segment_seconds: int,
+    audio: bool = True,
+) -> List[str]:
+    """
+    ffmpeg args that decode the input once and write every rendition as an
+    HLS variant: `out_dir/<label>/index.m3u8` plus its `seg_NNNNN.ts`
+    segments, and `out_dir/master.m3u8` listing all variants. Keyframes are
+    forced on segment boundaries so every segment starts independently.
+    """
+    labels = list(renditions.keys())
+    split = f"[0:v]split={len(labels)}" + "".join(f"[v{i}]" for i in range(len(labels)))
+    scales = [
+        f"[v{i}]{scale_filter(renditions[label])}[out{i}]"
+        for i, label in enumerate(labels)
+    ]
+
+    ff_args = [
+        "ffmpeg", "-y",
+        "-i", temp_path,
+        "-filter_complex", ";".join([split] + scales),
+    ]
+    stream_map = []
+    for i, label in enumerate(labels):
+        ff_args += ["-map", f"[out{i}]"]
+        if audio:
+            ff_args += ["-map", "0:a:0"]
+        stream_map.append(f"v:{i},a:{i},name:{label}" if audio else f"v:{i},name:{label}")
+    for i, label in enumerate(labels):
+        ff_args += codec_args(renditions[label], i)
+    ff_args += [
+        "-c:a", "aac",
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+        "-sc_threshold", "0",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(out_dir, "%v", "seg_%05d.ts"),
+        "-master_pl_name", MASTER_PLAYLIST,
+        "-var_stream_map", " ".join(stream_map),
+        os.path.join(out_dir, "%v", VARIANT_PLAYLIST),
+    ]
+    return ff_args
+
+
+def encode_hls(
+    file_name: str,
+    temp_path: str,
+    renditions: Dict[str, Rendition],
+    segment_seconds: int,
+    audio: Optional[bool] = None,
+) -> Dict[str, RenditionResult]:
+    """
+    Run one ffmpeg process writing every rendition as HLS. Each rendition's
+    path is its variant directory; the master playlist sits one level up.
+    `audio` is whether the input has an audio track (checked if None).
+    """
+    if audio is None:
+        audio = has_audio(temp_path)
+    out_dir = hls_output_dir(file_name)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    start = time.perf_counter()
+    ret = subprocess.call(build_hls_args(temp_path, renditions, out_dir, segment_seconds, audio))
+    elapsed = time.perf_counter() - start
+
+    ok = ret == 0 and os.path.exists(os.path.join(out_dir, MASTER_PLAYLIST))
+    results = {}
+    for res_label in renditions:
+        variant_dir = os.path.join(out_dir, res_label)
+        if ok and os.path.exists(os.path.join(variant_dir, VARIANT_PLAYLIST)):
+            results[res_label] = RenditionResult(res_label, True, path=variant_dir, encode_seconds=elapsed)
+        else:
+            results[res_label] = RenditionResult(
+                res_label, False, error=f"ffmpeg exited with {ret}", encode_seconds=elapsed
+            )
+    if not any(r.ok for r in results.values()):
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return results
+
+
+def hls_files(out_dir: str) -> List[Tuple[str, str]]:
+    """
+    (local path, path relative to out_dir with '/' separators) of every
+    playlist and segment under out_dir.
+    """
+    files = []
+    for root, _, names in os.walk(out_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            files.append((path, os.path.relpath(path, out_dir).replace(os.sep, "/")))
+    return files
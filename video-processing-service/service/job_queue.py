@@ -0,0 +1,141 @@
+import socket
+from typing import Dict, Iterable, List, Tuple
+
+import redis
+
+# A job as read from the stream: (message ID, decoded fields)
+Job = Tuple[str, Dict[str, str]]
+
+
+def _stream_id(msg_id) -> Tuple[int, int]:
+    """
+    A stream entry ID ('1700000000000-0') as a tuple, for ordering.
+    """
+    if isinstance(msg_id, bytes):
+        msg_id = msg_id.decode("utf-8")
+    ms, _, seq = msg_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _decode(entries) -> List[Job]:
+    jobs = []
+    for msg_id, fields in entries or []:
+        if fields is None:  # entry was trimmed/deleted while pending
+            continue
+        jobs.append((
+            msg_id.decode("utf-8"),
+            {k.decode("utf-8"): v.decode("utf-8") for k, v in fields.items()},
+        ))
+    return jobs
+
+
+class JobQueue:
+    """
+    Durable upload jobs on a Redis Stream read through a consumer group.
+
+    Each replica reads with its own consumer name, so a job is delivered to
+    exactly one replica. A job stays pending until ack() is called; jobs whose
+    consumer stopped heartbeating for `claim_idle_ms` are taken over by
+    reclaim() on any replica. Jobs delivered more than `max_deliveries` times
+    are moved to a dead-letter stream instead of being retried forever.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: str,
+        group: str,
+        consumer: str | None = None,
+        claim_idle_ms: int = 60_000,
+        max_deliveries: int = 3,
+    ):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or socket.gethostname()
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.dead_letter_stream = f"{stream}:dead"
+        self._claim_cursor = "0-0"
+
+    def ensure_group(self):
+        """
+        Create the stream and consumer group if they don't exist yet.
+        """
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read(self, count: int, block_ms: int) -> List[Job]:
+        """
+        Read up to `count` new jobs, waiting at most `block_ms` for one to arrive.
+        """
+        resp = self.client.xreadgroup(self.group, self.consumer, {self.stream: ">"}, count=count, block=block_ms)
+        jobs = []
+        for _, entries in resp or []:
+            jobs.extend(_decode(entries))
+        return jobs
+
+    def reclaim(self, count: int) -> List[Job]:
+        """
+        Take over up to `count` jobs that have been idle for claim_idle_ms
+        (their worker died or its replica went away).
+        """
+        resp = self.client.xautoclaim(
+            self.stream, self.group, self.consumer,
+            min_idle_time=self.claim_idle_ms, start_id=self._claim_cursor, count=count,
+        )
+        next_cursor, entries = resp[0], resp[1]
+        self._claim_cursor = next_cursor.decode("utf-8") if isinstance(next_cursor, bytes) else next_cursor
+
+        jobs = []
+        for msg_id, fields in _decode(entries):
+            if self.delivery_count(msg_id) > self.max_deliveries:
+                print(f"[JobQueue] Job {msg_id} exceeded {self.max_deliveries} deliveries, dead-lettering")
+                self.client.xadd(self.dead_letter_stream, fields)
+                self.ack(msg_id)
+                continue
+            jobs.append((msg_id, fields))
+        return jobs
+
+    def heartbeat(self, msg_ids: Iterable[str]):
+        """
+        Reset the idle time of jobs we are still working on so other replicas
+        don't reclaim them.
+        """
+        msg_ids = list(msg_ids)
+        if msg_ids:
+            self.client.xclaim(
+                self.stream, self.group, self.consumer,
+                min_idle_time=0, message_ids=msg_ids, justid=True,
+            )
+
+    def delivery_count(self, msg_id: str) -> int:
+        pending = self.client.xpending_range(self.stream, self.group, min=msg_id, max=msg_id, count=1)
+        return pending[0]["times_delivered"] if pending else 0
+
+    def ack(self, msg_id: str):
+        self.client.xack(self.stream, self.group, msg_id)
+
+    def trim(self) -> int:
+        """
+        Delete entries every consumer group is done with: those older than
+        each group's oldest pending entry and last-delivered entry. Jobs not
+        yet read or acked are never trimmed (unlike MAXLEN under a backlog).
+        Returns the number of entries removed.
+        """
+        floor = None
+        for group in self.client.xinfo_groups(self.stream):
+            oldest = group["last-delivered-id"]
+            pending = self.client.xpending(self.stream, group["name"])
+            if pending["pending"] and _stream_id(pending["min"]) < _stream_id(oldest):
+                oldest = pending["min"]
+            if floor is None or _stream_id(oldest) < _stream_id(floor):
+                floor = oldest
+        if floor is None:
+            return 0
+        if isinstance(floor, bytes):
+            floor = floor.decode("utf-8")
+        return self.client.xtrim(self.stream, minid=floor, approximate=False)
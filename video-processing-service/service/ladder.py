@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional, Tuple
+
+from .config import Rendition
+
+
+def plan_ladder(
+    ladder: Dict[str, Rendition],
+    source_height: Optional[int],
+    default_preset: str,
+    default_crf: int,
+) -> Tuple[Dict[str, Rendition], List[str]]:
+    """
+    Renditions to encode (with preset/CRF defaults filled in) and the labels
+    skipped because they would upscale a `source_height` source. If every rung
+    is taller than the source, the smallest one is kept at the source height
+    so there is always one output. An unknown source height skips nothing.
+    """
+    resolved = {
+        label: rung.model_copy(update={
+            "preset": rung.preset or default_preset,
+            "crf": default_crf if rung.crf is None else rung.crf,
+        })
+        for label, rung in ladder.items()
+    }
+    if not source_height:
+        return resolved, []
+
+    plan = {label: rung for label, rung in resolved.items() if rung.height <= source_height}
+    skipped = [label for label in resolved if label not in plan]
+    if not plan:
+        label = min(resolved, key=lambda l: resolved[l].height)
+        plan[label] = resolved[label].model_copy(update={"height": source_height - source_height % 2})
+        skipped.remove(label)
+    return plan, skipped
+
+
+def scale_filter(rendition: Rendition) -> str:
+    """
+    Scale to the rung's height keeping the aspect ratio (width rounded to even).
+    """
+    return f"scale=-2:{rendition.height}"
+
+
+def codec_args(rendition: Rendition, index: Optional[int] = None) -> List[str]:
+    """
+    libx264 options for one rendition. `index` selects the output video
+    stream when several renditions share one ffmpeg output (HLS variants).
+    """
+    stream = "" if index is None else f":v:{index}"
+    args = [
+        f"-c{stream or ':v'}", "libx264",
+        f"-preset{stream}", rendition.preset,
+        f"-crf{stream}", str(rendition.crf),
+    ]
+    if rendition.maxrate:
+        rate = rendition.maxrate
+        bufsize = f"{2 * float(rate[:-1]):g}{rate[-1]}" if rate[-1].isalpha() else str(2 * int(rate))
+        args += [f"-maxrate{stream}", rate, f"-bufsize{stream}", bufsize]
+    return args
@@ -1,18 +1,34 @@
 import os
 import json
 import asyncio
-import subprocess
-import tempfile
-from io import BytesIO
-from typing import List, Tuple
-from multiprocessing import Process
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List
 
 import redis
 import requests
-from bson import ObjectId
-from fastapi import FastAPI
+import uvicorn
+from fastapi import FastAPI, Request
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
-from fastapi.responses import StreamingResponse
+from pymongo import MongoClient
+from fastapi.responses import PlainTextResponse
+
+from .config import settings
+from .config import Rendition
+from .encoder import RenditionResult, encode_rendition, encode_single_pass
+from .events import EventEmitter
+from .gridfs_http import gridfs_response
+from .gridfs_io import download_to_file
+from .hls import CONTENT_TYPES, MASTER_PLAYLIST, VARIANT_PLAYLIST, encode_hls, hls_files, hls_output_dir
+from .job_queue import JobQueue
+from .ladder import plan_ladder
+from .probe import probe_media
+from .scheduler import Scheduler, ScheduledJob, estimate_cost
+from .segmented import encode_segmented
+from .timing import StageTimings
+from .worker_pool import WorkerPool, available_cpus, queue_for, workers_for
 
 app = FastAPI()
 
@@ -23,6 +39,8 @@ MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 mongo_client = AsyncIOMotorClient(MONGO_URL)
 db = mongo_client.video_status
 grid_fs_bucket = AsyncIOMotorGridFSBucket(db)
+# Blocking handle for the listener and workers (motor belongs to the HTTP server's loop)
+metadata_collection = MongoClient(MONGO_URL).video_status.video_metadata
 
 # ------------------------------------------------------------------------------
 # Redis Setup
@@ -35,274 +53,488 @@ redis_channel = redis.Redis(host=redis_host, port=redis_port)
 # Monitoring Service URL (if you call it at start/end)
 # ------------------------------------------------------------------------------
 MONITORING_URL = os.getenv("MONITORING_URL", "http://monitoring-service.default.svc.cluster.local:80")
+monitoring_emitter: EventEmitter | None = None  # one per process, created on first use
+
+
+def monitoring_events() -> EventEmitter:
+    """
+    This process's buffered emitter of start/end events (see service/events.py).
+    """
+    global monitoring_emitter
+    if monitoring_emitter is None:
+        monitoring_emitter = EventEmitter(
+            f"{MONITORING_URL}/events",
+            max_batch=settings.monitoring_batch_size,
+            flush_seconds=settings.monitoring_flush_seconds,
+        )
+    return monitoring_emitter
 
 
 # ------------------------------------------------------------------------------
-# Video Resolutions to Generate
+# Worker Pool (created by listen_for_videos in the listener process)
 # ------------------------------------------------------------------------------
-resolutions = {
-    "720p": (1280, 720),
-    "480p": (640, 480),
-    # Add more if needed, e.g. "360p": (480, 360),
-}
+worker_pool: WorkerPool | None = None
+scheduler: Scheduler | None = None  # jobs read from the stream, waiting for an idle worker
 
 # ------------------------------------------------------------------------------
 # Helper: Download + Upload
 # ------------------------------------------------------------------------------
-async def get_video_bytes(video_id: str) -> bytes:
+async def download_video_to_file(video_id: str) -> str:
     """
-    Download the original video from GridFS into memory as bytes.
+    Stream the original video from GridFS to a temp file, return its path.
     """
-    buf = BytesIO()
-    await grid_fs_bucket.download_to_stream(ObjectId(video_id), buf)
-    return buf.getvalue()
+    return await download_to_file(grid_fs_bucket, video_id, suffix=".mp4")
 
-async def upload_file_to_gridfs(file_name: str, contents: bytes) -> str:
+async def upload_file_to_gridfs(file_name: str, contents, metadata: dict | None = None) -> str:
     """
-    Upload these bytes to Mongo GridFS, return the ID as str.
+    Upload bytes (or a binary file object, read in chunks) to Mongo GridFS,
+    return the ID as str.
     """
-    _id = await grid_fs_bucket.upload_from_stream(file_name, contents)
+    _id = await grid_fs_bucket.upload_from_stream(file_name, contents, metadata=metadata)
     return str(_id)
 
+async def record_outputs(video_id: str, transcript_file_id: str, resolutions_map: Dict[str, str],
+                         hls_playlist: str = ""):
+    """
+    Store the processed outputs on the original's video_metadata document so
+    the upload service can reuse them for re-uploads of the same content.
+    """
+    await db.video_metadata.update_one(
+        {"video_id": video_id},
+        {"$set": {
+            "processed": True,
+            "transcript_file_id": transcript_file_id,
+            "resolutions": resolutions_map,
+            "hls_playlist": hls_playlist,
+        }},
+    )
+
+def store_media(video_id: str, media: dict):
+    metadata_collection.update_one({"video_id": video_id}, {"$set": {"media": media}})
+
+def media_for(video_id: str) -> dict | None:
+    """
+    The upload's media metadata (duration, resolution, codecs, audio presence)
+    from video_metadata. The first time, it is probed over this service's own
+    ranged /download endpoint, so ffprobe reads only the container headers,
+    and stored for every later stage and redelivery.
+    """
+    try:
+        doc = metadata_collection.find_one({"video_id": video_id}, {"media": 1})
+        if doc and doc.get("media"):
+            return doc["media"]
+        # Runs on a probe thread (see listen_for_videos); the job is heartbeated meanwhile
+        media = probe_media(f"http://127.0.0.1:{settings.http_port}/download/{video_id}", timeout=15)
+        if media:
+            store_media(video_id, media)
+        return media
+    except Exception as e:
+        # The worker probes the downloaded file instead
+        print(f"[media_for] Could not load media metadata for {video_id}: {e}")
+        return None
+
 # ------------------------------------------------------------------------------
 # Video Creation (FFmpeg)
 # ------------------------------------------------------------------------------
-def create_video(
-    file_name: str,
-    temp_path: str,
-    resolution: str,
-    dimensions: Tuple[int, int],
-    subtitles_text: str | None,
-    video_id: str,
-):
+def _encode_one(file_name: str, temp_path: str, res_label: str, rendition: Rendition) -> Dict[str, RenditionResult]:
+    return {res_label: encode_rendition(file_name, temp_path, res_label, rendition)}
+
+def segment_workers() -> int:
+    """
+    ffmpeg processes one segmented encode runs at once. Every pool worker may
+    be running one, so by default each gets an equal share of the CPUs.
+    """
+    if settings.segment_workers:
+        return settings.segment_workers
+    pool_size = workers_for(settings.max_workers, settings.workers_per_cpu)
+    return max(1, available_cpus() // pool_size)
+
+def submit_encodes(executor, timings: StageTimings, file_name: str, temp_path: str,
+                   renditions: Dict[str, Rendition], media: dict | None = None) -> List[Future]:
     """
-    Run ffmpeg to rescale. Then upload the result to GridFS, store the file ID in Redis 
-    so the parent can retrieve it.
+    Queue the rescaling of the original into every rendition on `executor`.
+    Either a single ffmpeg run with a split filter, or one ffmpeg per
+    resolution run side by side (settings.encode_mode), or a single run
+    writing HLS (settings.output_format). Long videos are encoded in
+    parallel segments instead (settings.segment_min_seconds). Each future
+    yields a map of resolution -> RenditionResult. ffmpeg does the work in
+    its own process, so threads are enough to wait on it.
     """
-    print(f"[create_video] Rescaling {file_name} to {resolution}")
-    out_filename = f"{os.path.splitext(file_name)[0]}_{resolution}.mp4"
-    width, height = dimensions
-
-    ff_args = [
-        "ffmpeg", "-y",
-        "-i", temp_path,
-        "-s", f"{width}x{height}",
-        "-c:v", "libx264",
-        "-c:a", "aac",
-        out_filename
+    has_audio = media["has_audio"] if media else None
+    duration = (media or {}).get("duration") or 0
+    if settings.output_format != "hls" and settings.segment_min_seconds and duration >= settings.segment_min_seconds:
+        workers = segment_workers()
+        print(f"[submit_encodes] {duration:.0f}s video, encoding {file_name} in "
+              f"{settings.segment_seconds}s segments, {workers} at a time")
+        return [executor.submit(
+            timings.timed, "encode", encode_segmented, file_name, temp_path, renditions,
+            settings.segment_seconds, workers,
+        )]
+    if settings.output_format == "hls":
+        print(f"[submit_encodes] Segmenting {file_name} to HLS at {', '.join(renditions)}")
+        return [executor.submit(
+            timings.timed, "encode", encode_hls, file_name, temp_path, renditions, settings.hls_segment_seconds,
+            has_audio,
+        )]
+    print(f"[submit_encodes] Rescaling {file_name} to {', '.join(renditions)} ({settings.encode_mode})")
+    if settings.encode_mode == "single_pass":
+        return [executor.submit(timings.timed, "encode", encode_single_pass, file_name, temp_path, renditions)]
+    return [
+        executor.submit(timings.timed, f"encode_{res_label}", _encode_one, file_name, temp_path, res_label, rendition)
+        for res_label, rendition in renditions.items()
     ]
-    ret = subprocess.call(ff_args)
-
-    file_id = ""
-    if ret == 0 and os.path.exists(out_filename):
-        print(f"[create_video] Successfully created {out_filename}, uploading to GridFS...")
-        with open(out_filename, "rb") as f:
-            data = f.read()
-        loop = asyncio.get_event_loop()
-        file_id = loop.run_until_complete(upload_file_to_gridfs(out_filename, data))
-        print(f"[create_video] Uploaded {out_filename} -> GridFS ID = {file_id}")
-    else:
-        print(f"[create_video] ffmpeg failed for resolution={resolution}")
-
-    # Clean up local file
-    try:
-        os.remove(out_filename)
-    except:
-        pass
 
-    # Store the resulting file_id in Redis for the parent process
-    key = f"video_result_{video_id}_{resolution}"
-    if file_id:
-        redis_channel.set(key, file_id)
-    else:
-        redis_channel.set(key, "")
+async def upload_renditions(results: Dict[str, RenditionResult]):
+    """
+    Upload every successfully encoded rendition to GridFS (setting its file_id)
+    and remove the local output files.
+    """
+    for result in results.values():
+        if not result.ok:
+            print(f"[upload_renditions] ffmpeg failed for resolution={result.resolution}: {result.error}")
+            continue
+        try:
+            with open(result.path, "rb") as f:
+                result.file_id = await upload_file_to_gridfs(result.path, f)
+            print(f"[upload_renditions] Uploaded {result.path} -> GridFS ID = {result.file_id}")
+        except Exception as e:
+            result.ok = False
+            result.error = f"GridFS upload failed: {e}"
+            print(f"[upload_renditions] {result.error}")
+        finally:
+            try:
+                os.remove(result.path)
+            except OSError:
+                pass
 
-# ------------------------------------------------------------------------------
-# The Main Video Processing Pipeline (runs in a child process)
-# ------------------------------------------------------------------------------
-def process_video(file_name: str, video_id: str):
+async def upload_hls(video_id: str, file_name: str, results: Dict[str, RenditionResult]) -> str:
     """
-    Steps:
-      1) (Optional) Let the monitoring service know we are starting.
-      2) Download original video from GridFS.
-      3) Ask audio service for transcription.
-      4) Create a .txt file from that transcription (if any).
-      5) Rescale video into multiple resolutions (sub-processes).
-      6) Gather final file IDs from Redis.
-      7) Publish final JSON to 'video_results'.
-      8) (Optional) Let the monitoring service know we are done.
+    Upload every playlist and segment as GridFS files named
+    hls/<video_id>/<path>, the layout the monitoring service serves under
+    /hls/, set each rendition's file_id to its variant playlist and remove the
+    local output. Returns the master playlist's GridFS name ("" on failure).
     """
-    print(f"[process_video] Starting process for: {file_name} (video_id={video_id})")
+    out_dir = hls_output_dir(file_name)
+    if not any(r.ok for r in results.values()):
+        for result in results.values():
+            print(f"[upload_hls] ffmpeg failed for resolution={result.resolution}: {result.error}")
+        return ""
 
-    # 1) Notify monitoring service (start) - OPTIONAL
+    prefix = f"hls/{video_id}"
     try:
-        start_url = f"{MONITORING_URL}/video-processing-start/{video_id}"
-        resp_start = requests.post(start_url)
-        if resp_start.status_code != 200:
-            print(f"[process_video] Warning: Monitoring start call failed: {resp_start.text}")
-        else:
-            print("[process_video] Monitoring service notified: start")
+        for path, rel_path in hls_files(out_dir):
+            label = rel_path.split("/", 1)[0]
+            if label in results and not results[label].ok:
+                continue
+            content_type = CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+            with open(path, "rb") as f:
+                file_id = await upload_file_to_gridfs(f"{prefix}/{rel_path}", f, {"content_type": content_type})
+            if rel_path == f"{label}/{VARIANT_PLAYLIST}":
+                results[label].file_id = file_id
+        print(f"[upload_hls] Uploaded HLS output as {prefix}/")
+        return f"{prefix}/{MASTER_PLAYLIST}"
     except Exception as e:
-        print(f"[process_video] Could not notify monitoring service start: {e}")
-
-    loop = asyncio.get_event_loop()
+        for result in results.values():
+            result.ok = False
+            result.error = f"GridFS upload failed: {e}"
+        print(f"[upload_hls] GridFS upload failed: {e}")
+        return ""
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
 
-    # 2) Download from GridFS
-    original_bytes = loop.run_until_complete(get_video_bytes(video_id))
-    print(f"[process_video] Downloaded original video bytes from GridFS (ID={video_id}).")
-
-    # 3) Call the audio service for transcription
+# ------------------------------------------------------------------------------
+# The Main Video Processing Pipeline (runs in a child process)
+# ------------------------------------------------------------------------------
+def request_transcription(video_id: str) -> str | None:
+    """
+    Ask the audio service to transcribe the video, return the joined text
+    ("" if there was no speech, None if the call fails).
+    """
     audio_url = os.getenv("AUDIO_SERVICE_URL", "http://audio-service.default.svc.cluster.local:83/audio")
-    transcription_text = ""
     try:
-        print(f"[process_video] Sending request to audio service -> {audio_url}")
+        print(f"[request_transcription] Sending request to audio service -> {audio_url}")
         resp = requests.post(audio_url, params={"video_id": video_id}, timeout=600)
         if resp.status_code == 200:
             transcription_chunks = resp.json().get("transcription", [])
             transcription_text = " ".join([chunk["text"] for chunk in transcription_chunks])
-            print(f"[process_video] Transcription received. Length: {len(transcription_text)} chars")
-        else:
-            print(f"[process_video] Audio service error: {resp.status_code}, no transcription.")
+            print(f"[request_transcription] Transcription received. Length: {len(transcription_text)} chars")
+            return transcription_text
+        print(f"[request_transcription] Audio service error: {resp.status_code}, no transcription.")
     except Exception as e:
-        print(f"[process_video] Audio service request failed: {e}")
-
-    # 4) Create a .txt file in GridFS if we have a transcription
-    txt_file_id = ""
-    if transcription_text.strip():
-        txt_filename = f"{os.path.splitext(file_name)[0]}_transcription.txt"
-        text_bytes = transcription_text.encode("utf-8")
-        txt_file_id = loop.run_until_complete(upload_file_to_gridfs(txt_filename, text_bytes))
-        print(f"[process_video] Transcription uploaded as file_id={txt_file_id}")
-    else:
-        print("[process_video] No transcription text, skipping .txt upload.")
-
-    # 5) Rescale the original video in sub-processes
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
-        tmp.write(original_bytes)
-        tmp_path = tmp.name
-    print(f"[process_video] Created temp file: {tmp_path}")
-
-    processes = []
-    for res_label, dims in resolutions.items():
-        proc = Process(
-            target=create_video,
-            args=(file_name, tmp_path, res_label, dims, None, video_id),
-        )
-        proc.start()
-        processes.append(proc)
+        print(f"[request_transcription] Audio service request failed: {e}")
+    return None
 
-    # Wait for all sub-processes
-    for proc in processes:
-        proc.join()
+def process_video(file_name: str, video_id: str, media: dict | None = None, user_id: str = ""):
+    """
+    Runs as a small DAG:
+      1) Let the monitoring service know we are starting (batched, see
+         EventEmitter), with the uploader's user_id from the job.
+      2) Download original video from GridFS (once). `media` is the upload's
+         probed metadata (see media_for); it is only probed here if missing.
+         Ladder rungs taller than the source are skipped instead of upscaled.
+      3) Fan out, all in parallel:
+           - ask the audio service for a transcription (unless the video
+             has no audio track)
+           - rescale into every remaining rung of settings.ladder (one ffmpeg
+             run with a split filter, or one ffmpeg per resolution; see
+             settings.encode_mode), as .mp4 files or HLS segments
+             (settings.output_format)
+      4) Join, then upload the transcription .txt (if any) and the renditions,
+         and record them on the video_metadata document (for dedup) if every
+         rendition and the transcription succeeded.
+      5) Publish final JSON (with per-stage timings) to 'video_results'.
+      6) Let the monitoring service know we are done (batched).
+    """
+    print(f"[process_video] Starting process for: {file_name} (video_id={video_id})")
+    timings = StageTimings()
+
+    # 1) Notify monitoring service (start), sent in the next batch
+    monitoring_events().emit("start", video_id, user_id=user_id or None)
+
+    loop = asyncio.get_event_loop()
 
-    # Clean up
+    # 2) Download from GridFS
+    with timings.stage("download"):
+        tmp_path = loop.run_until_complete(download_video_to_file(video_id))
+    print(f"[process_video] Downloaded original video from GridFS (ID={video_id}) to {tmp_path}.")
+
+    if media is None:
+        with timings.stage("probe"):
+            media = probe_media(tmp_path)
+        if media:
+            store_media(video_id, media)
+    video = (media or {}).get("video") or {}
+    has_audio = media["has_audio"] if media else None
+    renditions, skipped = plan_ladder(settings.ladder, video.get("height"), settings.preset, settings.quality)
+    if skipped:
+        print(f"[process_video] Source is {video['width']}x{video['height']}, not upscaling to {', '.join(skipped)}")
+
+    # 3) Transcription and rescaling in parallel
     try:
-        os.remove(tmp_path)
-    except:
-        pass
-
-    # 6) Gather new file IDs from Redis
-    results_map = {}
-    for res_label in resolutions.keys():
-        redis_key = f"video_result_{video_id}_{res_label}"
-        f_id = None
-        for _ in range(50):  # poll up to 50 times
-            val = redis_channel.get(redis_key)
-            if val:
-                f_id = val.decode("utf-8")
-                redis_channel.delete(redis_key)
-                break
+        with timings.stage("fan_out"), ThreadPoolExecutor(max_workers=1 + len(renditions)) as executor:
+            transcription_future = None
+            if has_audio is False:
+                print("[process_video] No audio track, skipping transcription.")
             else:
-                asyncio.run(asyncio.sleep(0.1))
-        results_map[res_label] = f_id if f_id else ""
+                transcription_future = executor.submit(timings.timed, "transcribe", request_transcription, video_id)
+            encode_futures = submit_encodes(executor, timings, file_name, tmp_path, renditions, media)
+
+            rendition_results: Dict[str, RenditionResult] = {}
+            for future in encode_futures:
+                rendition_results.update(future.result())
+            transcription_text = transcription_future.result() if transcription_future else ""
+            transcription_ok = transcription_text is not None
+            transcription_text = transcription_text or ""
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    # 4) Upload the transcription .txt (if any) and the renditions
+    with timings.stage("upload"):
+        txt_file_id = ""
+        if transcription_text.strip():
+            txt_filename = f"{os.path.splitext(file_name)[0]}_transcription.txt"
+            text_bytes = transcription_text.encode("utf-8")
+            txt_file_id = loop.run_until_complete(upload_file_to_gridfs(txt_filename, text_bytes))
+            print(f"[process_video] Transcription uploaded as file_id={txt_file_id}")
+        else:
+            print("[process_video] No transcription text, skipping .txt upload.")
 
-    # 7) Publish final message to 'video_results' channel
+        hls_playlist = ""
+        if settings.output_format == "hls":
+            hls_playlist = loop.run_until_complete(upload_hls(video_id, file_name, rendition_results))
+        else:
+            loop.run_until_complete(upload_renditions(rendition_results))
+
+    results_map = {res_label: r.file_id for res_label, r in rendition_results.items()}
+    if all(r.ok for r in rendition_results.values()) and transcription_ok:
+        loop.run_until_complete(record_outputs(video_id, txt_file_id, results_map, hls_playlist))
+    elif not transcription_ok:
+        # Not reusable for dedup: a re-upload of the same content gets processed again
+        print("[process_video] Transcription failed, not recording outputs for reuse.")
+    for res_label, r in rendition_results.items():
+        status = "ok" if r.ok else f"failed ({r.error})"
+        print(f"[process_video] {res_label}: {status}, encode took {r.encode_seconds:.1f}s")
+    print(f"[process_video] Stage timings: {timings.summary()}")
+
+    # 5) Publish final message to 'video_results' channel
     #    (If the monitoring service also subscribes to this, it can pick it up.)
     final_message = {
         "event": "video_processed",
         "video_id": video_id,
         "file_name": file_name,
         "transcript_file_id": txt_file_id,
-        "resolutions": results_map
+        "resolutions": results_map,
+        "hls_playlist": hls_playlist,
+        "skipped_renditions": skipped,
+        "rendition_results": {res_label: r.to_dict() for res_label, r in rendition_results.items()},
+        "timings": timings.to_dict(),
     }
     redis_channel.publish("video_results", json.dumps(final_message))
     print(f"[process_video] Published final results to 'video_results' channel.")
 
-    try:
-        end_url = f"{MONITORING_URL}/video-processing-end/{video_id}"
-        end_payload = {
-            "processed_video_id": "",  # if you want to store a main mp4 ID here
-            "transcription_id": txt_file_id,
-            "video_processing_status": "done",
-            "status": "done"
-        }
-        resp_end = requests.post(end_url, json=end_payload)
-        if resp_end.status_code != 200:
-            print(f"[process_video] Warning: Monitoring end call failed: {resp_end.text}")
-        else:
-            print("[process_video] Monitoring service notified: end")
-    except Exception as e:
-        print(f"[process_video] Monitoring service notifiedd: end ")
+    # 6) Notify monitoring service (end), sent in the next batch
+    monitoring_events().emit(
+        "end",
+        video_id,
+        processed_video_id="",  # if you want to store a main mp4 ID here
+        transcription_id=txt_file_id,
+        resolutions=results_map,
+        hls_playlist=hls_playlist,
+        video_processing_status="done",
+        status="done",
+    )
 
     print(f"[process_video] Done with video_id={video_id}.\n")
 
 # ------------------------------------------------------------------------------
-# Redis Pub/Sub Listener
+# Redis Stream Listener
 # ------------------------------------------------------------------------------
 def listen_for_videos():
     """
     Main loop:
-      - Subscribes to 'video_uploads' for new videos
-      - Possibly also handles 'video_results' internally if needed
+      - Reads upload jobs from the 'video_uploads' stream through the
+        processing consumer group, holding at most the pool's max_queue
+        waiting jobs (jobs that don't fit stay in Redis for other replicas)
+      - Takes over jobs left pending by dead workers/replicas
+      - Probes each new job's media on settings.probe_workers threads (the
+        job is heartbeated meanwhile), estimates its cost from it and holds
+        it in the scheduler; idle workers get jobs in settings.schedule_policy
+        order rather than arrival order
+      - Acks a job once process_video finished; failed jobs stay pending and
+        are redelivered after settings.claim_idle_ms
+      - Trims stream entries that every consumer group has acked
     """
-    pubsub = redis_channel.pubsub()
-    pubsub.subscribe("video_uploads", "video_results")
-    print("[listen_for_videos] Subscribed to Redis channels: 'video_uploads' & 'video_results'")
-
-    loop = asyncio.get_event_loop()
-
-    for message in pubsub.listen():
-        if message["type"] != "message":
-            continue
-
-        channel = message["channel"].decode("utf-8")
-        if channel == "video_uploads":
-            # e.g.: "myvideo.mp4,<gridfs_id>"
-            data = message["data"].decode("utf-8").split(",")
-            file_name, video_id = data[0], data[1]
-            print(f"[listen_for_videos] Received upload event: {file_name}, {video_id}")
-            Process(target=process_video, args=[file_name, video_id]).start()
-
-        elif channel == "video_results":
-            # If you want to do something internal on final results, you can handle it here.
-            data_str = message["data"].decode("utf-8")
-            try:
-                data_json = json.loads(data_str)
-                print(f"[listen_for_videos] Received final results for video_id={data_json.get('video_id')}")
-            except:
-                print("[listen_for_videos] Could not parse video_results as JSON:", data_str)
+    global worker_pool, scheduler
+    max_workers = workers_for(settings.max_workers, settings.workers_per_cpu)
+    worker_pool = WorkerPool(
+        max_workers=max_workers,
+        max_queue=queue_for(settings.max_queue, settings.queue_per_worker, max_workers),
+    )
+    print(f"[listen_for_videos] Worker pool: {worker_pool.max_workers} workers, queue of {worker_pool.max_queue}")
+    scheduler = Scheduler(settings.schedule_policy, aging=settings.schedule_aging, weights=settings.user_weights)
+    print(f"[listen_for_videos] Scheduling policy: {scheduler.policy}")
+
+    job_queue = JobQueue(
+        redis_channel,
+        stream=settings.redis_channel,
+        group=settings.redis_group,
+        claim_idle_ms=settings.claim_idle_ms,
+        max_deliveries=settings.max_deliveries,
+    )
+    job_queue.ensure_group()
+    print(f"[listen_for_videos] Reading stream '{job_queue.stream}' as {job_queue.group}/{job_queue.consumer}")
+
+    in_flight = set()
+    in_flight_lock = threading.Lock()
+    # Jobs read from the stream whose media is still being probed
+    probe_pool = ThreadPoolExecutor(max_workers=settings.probe_workers, thread_name_prefix="probe")
+    probing: List[Future] = []
+    heartbeat_every = settings.claim_idle_ms / 3000
+    last_heartbeat = 0.0
+
+    def on_done(msg_id, future):
+        with in_flight_lock:
+            in_flight.discard(msg_id)
+        if future.cancelled() or future.exception() is not None:
+            print(f"[listen_for_videos] Job {msg_id} failed, leaving it pending for redelivery: {future.exception()}")
+            return
+        job_queue.ack(msg_id)
+
+    def probe(msg_id, fields) -> ScheduledJob:
+        media = media_for(fields["video_id"])
+        return ScheduledJob(msg_id, fields, estimate_cost(media), fields.get("user_id", ""), media)
+
+    def admit(jobs):
+        for msg_id, fields in jobs:
+            print(f"[listen_for_videos] Received upload job {msg_id}: {fields['file_name']}, {fields['video_id']}")
+            with in_flight_lock:
+                in_flight.add(msg_id)
+            probing.append(probe_pool.submit(probe, msg_id, fields))
+
+    def schedule_probed():
+        # Only this thread touches the scheduler; probe threads just return jobs
+        for future in [f for f in probing if f.done()]:
+            probing.remove(future)
+            job = future.result()  # media_for never raises
+            print(f"[listen_for_videos] Scheduled job {job.msg_id} (cost {job.cost:.0f})")
+            scheduler.push(job)
+
+    def dispatch(job: ScheduledJob):
+        try:
+            future = worker_pool.submit(
+                process_video, job.fields["file_name"], job.fields["video_id"], job.media, job.user_id
+            )
+        except Exception as e:
+            # The job stays pending (no more heartbeats), so it is reclaimed later
+            print(f"[listen_for_videos] Could not start job {job.msg_id}, leaving it pending: {e}")
+            with in_flight_lock:
+                in_flight.discard(job.msg_id)
+            return
+        future.add_done_callback(lambda f, msg_id=job.msg_id: on_done(msg_id, f))
+
+    while True:
+        if time.monotonic() - last_heartbeat >= heartbeat_every:
+            with in_flight_lock:
+                job_queue.heartbeat(in_flight)
+            job_queue.trim()
+            last_heartbeat = time.monotonic()
+
+        schedule_probed()
+        # Jobs go to the pool only when a worker is idle, so the ones waiting
+        # for a worker (probing or in the scheduler) are what max_queue bounds
+        room = worker_pool.max_queue - len(scheduler) - len(probing)
+        if room > 0:
+            jobs = job_queue.reclaim(room)
+            if not jobs:
+                # Don't block long while jobs are waiting for a worker or a probe
+                jobs = job_queue.read(room, block_ms=200 if len(scheduler) or probing else 2000)
+            admit(jobs)
+
+        while len(scheduler) and worker_pool.idle_workers() > 0:
+            dispatch(scheduler.pop())
+
+        if room <= 0:
+            time.sleep(0.5)
 
 # ------------------------------------------------------------------------------
 # Download Endpoint
 # ------------------------------------------------------------------------------
-@app.get("/download/{file_id}")
-async def download_file(file_id: str):
+@app.api_route("/download/{file_id}", methods=["GET", "HEAD"])
+async def download_file(file_id: str, request: Request):
     """
-    Retrieve a file (video or text) from GridFS by _id and return it.
+    Retrieve a file (video or text) from GridFS by _id and return it, with
+    Range and ETag support so players can seek and browsers can cache.
     """
-    grid_out = await grid_fs_bucket.open_download_stream(ObjectId(file_id))
-    return StreamingResponse(grid_out, media_type="application/octet-stream")
+    return await gridfs_response(grid_fs_bucket, file_id, request.headers)
+
+# ------------------------------------------------------------------------------
+# Metrics Endpoint (Prometheus text format)
+# ------------------------------------------------------------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Worker pool load, for autoscaling on queue depth / busy workers.
+    """
+    stats = worker_pool.stats() if worker_pool else {}
+    if scheduler is not None:
+        stats["queue_depth"] = stats.get("queue_depth", 0) + len(scheduler)
+    lines = []
+    for name in ("queue_depth", "active_workers", "max_workers", "max_queue", "jobs_completed", "jobs_failed",
+                 "pool_restarts"):
+        lines.append(f"video_processing_{name} {stats.get(name, 0)}")
+    return "\n".join(lines) + "\n"
 
 # ------------------------------------------------------------------------------
 # Main Entry Point
 # ------------------------------------------------------------------------------
 if __name__ == "__main__":
     """
-    Typically you'd run:
-      uvicorn main:app --host 0.0.0.0 --port 8000
-    in one container, and also run listen_for_videos() 
-    in the same or another container.
-
-    For quick local testing, we just call listen_for_videos() so it blocks.
+    Serves the HTTP app (downloads, /metrics) from a background thread and
+    runs listen_for_videos() in the foreground, so both share the worker pool.
     """
+    server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=settings.http_port))
+    threading.Thread(target=server.run, daemon=True).start()
     listen_for_videos()
@@ -0,0 +1,89 @@
+import json
+import subprocess
+from datetime import datetime
+from typing import Optional
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(value) -> Optional[float]:
+    """
+    Frame rate from an ffprobe fraction such as '30000/1001'.
+    """
+    try:
+        num, den = (float(x) for x in str(value).split("/"))
+        return round(num / den, 3) if den else None
+    except ValueError:
+        return None
+
+
+def parse_probe(data: dict) -> dict:
+    """
+    Structured media metadata from `ffprobe -show_format -show_streams` JSON.
+    Width and height are as displayed (rotation applied).
+    """
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+    video = next(
+        (s for s in streams
+         if s.get("codec_type") == "video" and not s.get("disposition", {}).get("attached_pic")),
+        None,
+    )
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    media = {
+        "duration": _float(fmt.get("duration")) or _float((video or {}).get("duration")),
+        "size": int(fmt["size"]) if fmt.get("size") else None,
+        "format": fmt.get("format_name"),
+        "bit_rate": int(fmt["bit_rate"]) if fmt.get("bit_rate") else None,
+        "has_video": video is not None,
+        "has_audio": audio is not None,
+        "video": None,
+        "audio": None,
+        "probed_at": datetime.utcnow(),
+    }
+    if video:
+        width, height = int(video.get("width", 0)), int(video.get("height", 0))
+        rotation = video.get("tags", {}).get("rotate")
+        for side_data in video.get("side_data_list", []):
+            rotation = side_data.get("rotation", rotation)
+        rotation = int(float(rotation)) if rotation is not None else 0
+        if abs(rotation) % 180 == 90:
+            width, height = height, width
+        media["video"] = {
+            "codec": video.get("codec_name"),
+            "width": width,
+            "height": height,
+            "fps": _rate(video.get("avg_frame_rate")),
+            "pix_fmt": video.get("pix_fmt"),
+            "rotation": rotation,
+        }
+    if audio:
+        media["audio"] = {
+            "codec": audio.get("codec_name"),
+            "channels": audio.get("channels"),
+            "sample_rate": int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+        }
+    return media
+
+
+def probe_media(source: str, timeout: float = 60) -> Optional[dict]:
+    """
+    Run ffprobe once on a file path or URL (ffprobe reads only the container
+    headers, with HTTP range requests for a URL) and return parse_probe's
+    metadata, or None if probing fails.
+    """
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", source],
+            capture_output=True, text=True, check=True, timeout=timeout,
+        ).stdout
+        return parse_probe(json.loads(out))
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        print(f"[probe_media] Could not probe {source}: {e}")
+        return None
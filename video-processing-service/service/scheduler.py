@@ -0,0 +1,90 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+POLICIES = ("fifo", "sjf", "wfq")
+REFERENCE_PIXELS = 1280 * 720
+DEFAULT_COST = 60.0  # cost of a job with no probed duration: a one-minute 720p video
+
+
+def estimate_cost(media: Optional[dict]) -> float:
+    """
+    Relative encode cost of a job: seconds of video, weighted by the source
+    frame area relative to 720p (encode time grows with both).
+    """
+    if not media or not media.get("duration"):
+        return DEFAULT_COST
+    video = media.get("video") or {}
+    pixels = (video.get("width") or 1280) * (video.get("height") or 720)
+    return media["duration"] * max(0.25, pixels / REFERENCE_PIXELS)
+
+
+@dataclass
+class ScheduledJob:
+    msg_id: str
+    fields: dict
+    cost: float
+    user_id: str = ""
+    media: Optional[dict] = None
+    enqueued_at: float = 0.0  # set by Scheduler.push
+    # WFQ virtual finish tag, set by Scheduler.push
+    finish_tag: float = field(default=0.0, repr=False)
+
+
+class Scheduler:
+    """
+    Jobs waiting for an idle worker, handed out in policy order:
+
+      - "fifo": arrival order.
+      - "sjf":  shortest estimated cost first. Every second a job waits takes
+                `aging` off its cost, so long jobs are not starved by a steady
+                stream of short ones.
+      - "wfq":  weighted fair queueing across user_id (self-clocked fair
+                queueing): each user gets a share of worker time proportional
+                to its weight (default 1), FIFO within a user. A user's long
+                job is delayed only by other users' work, never starved.
+    """
+
+    def __init__(self, policy: str = "sjf", aging: float = 0.25,
+                 weights: Dict[str, float] | None = None, clock: Callable[[], float] = time.monotonic):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown scheduling policy {policy!r}, expected one of {POLICIES}")
+        self.policy = policy
+        self.aging = aging
+        self.weights = weights or {}
+        self.clock = clock
+        self._fifo: deque = deque()
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._fifo) if self.policy == "fifo" else len(self._heap)
+
+    def push(self, job: ScheduledJob):
+        job.enqueued_at = self.clock()
+        if self.policy == "fifo":
+            self._fifo.append(job)
+        elif self.policy == "sjf":
+            # cost - aging * (now - enqueued_at) orders the same as this, and
+            # unlike it doesn't change while the job waits
+            heapq.heappush(self._heap, (job.cost + self.aging * job.enqueued_at, next(self._seq), job))
+        else:
+            start = max(self._virtual_time, self._last_finish.get(job.user_id, 0.0))
+            job.finish_tag = start + job.cost / self.weights.get(job.user_id, 1.0)
+            self._last_finish[job.user_id] = job.finish_tag
+            heapq.heappush(self._heap, (job.finish_tag, next(self._seq), job))
+
+    def pop(self) -> Optional[ScheduledJob]:
+        if self.policy == "fifo":
+            return self._fifo.popleft() if self._fifo else None
+        if not self._heap:
+            return None
+        _, _, job = heapq.heappop(self._heap)
+        if self.policy == "wfq":
+            self._virtual_time = max(self._virtual_time, job.finish_tag)
+        return job
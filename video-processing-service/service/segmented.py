@@ -0,0 +1,108 @@
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from .config import Rendition
+from .encoder import RenditionResult, _remove_partial, build_single_pass_args, rendition_filename
+
+
+def build_split_args(temp_path: str, out_dir: str, segment_seconds: int) -> List[str]:
+    """
+    ffmpeg args that cut the video stream, without re-encoding, into pieces of
+    about `segment_seconds`. The segment muxer can only cut on keyframes, so
+    each piece starts with one and decodes on its own.
+    """
+    return [
+        "ffmpeg", "-y",
+        "-i", temp_path,
+        "-map", "0:v:0",
+        "-c", "copy",
+        "-f", "segment",
+        "-segment_time", str(segment_seconds),
+        "-reset_timestamps", "1",
+        os.path.join(out_dir, "part_%05d.mkv"),
+    ]
+
+
+def build_concat_args(list_path: str, temp_path: str, out_filename: str) -> List[str]:
+    """
+    ffmpeg args that join encoded pieces listed in `list_path` (concat
+    demuxer, stream copy) and add the source's audio, encoded once for the
+    whole video so there are no gaps at the joins.
+    """
+    return [
+        "ffmpeg", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", temp_path,
+        "-map", "0:v",
+        "-map", "1:a?",
+        "-c:v", "copy",
+        "-c:a", "aac",
+        out_filename,
+    ]
+
+
+def encode_segmented(
+    file_name: str,
+    temp_path: str,
+    renditions: Dict[str, Rendition],
+    segment_seconds: int,
+    workers: int,
+) -> Dict[str, RenditionResult]:
+    """
+    Split-encode-concat: cut the source at keyframes, encode every piece into
+    all renditions with up to `workers` ffmpeg processes at once, then concat
+    each rendition's pieces losslessly. Every rendition reports the elapsed
+    time of the whole run.
+    """
+    work_dir = tempfile.mkdtemp(prefix="segments_")
+    start = time.perf_counter()
+    try:
+        ret = subprocess.call(build_split_args(temp_path, work_dir, segment_seconds))
+        parts = sorted(glob.glob(os.path.join(work_dir, "part_*.mkv")))
+        if ret != 0 or not parts:
+            return _failed(renditions, f"splitting failed (ffmpeg exited with {ret})", start)
+
+        def encode_part(index_part):
+            index, part = index_part
+            outputs = {
+                label: (rendition, os.path.join(work_dir, f"{label}_{index:05d}.mp4"))
+                for label, rendition in renditions.items()
+            }
+            return subprocess.call(build_single_pass_args(part, outputs))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            codes = list(executor.map(encode_part, enumerate(parts)))
+        if any(codes):
+            return _failed(renditions, f"encoding a segment failed (ffmpeg exited with {max(codes)})", start)
+
+        results = {}
+        for label in renditions:
+            list_path = os.path.join(work_dir, f"{label}.txt")
+            with open(list_path, "w") as f:
+                for index in range(len(parts)):
+                    f.write(f"file '{os.path.join(work_dir, f'{label}_{index:05d}.mp4')}'\n")
+            out_filename = rendition_filename(file_name, label)
+            ret = subprocess.call(build_concat_args(list_path, temp_path, out_filename))
+            elapsed = time.perf_counter() - start
+            if ret == 0 and os.path.exists(out_filename):
+                results[label] = RenditionResult(label, True, path=out_filename, encode_seconds=elapsed)
+            else:
+                _remove_partial(out_filename)
+                results[label] = RenditionResult(
+                    label, False, error=f"concat failed (ffmpeg exited with {ret})", encode_seconds=elapsed
+                )
+        print(f"[encode_segmented] {len(parts)} segments x {len(renditions)} renditions, {workers} at a time")
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _failed(renditions: Dict[str, Rendition], error: str, start: float) -> Dict[str, RenditionResult]:
+    elapsed = time.perf_counter() - start
+    return {label: RenditionResult(label, False, error=error, encode_seconds=elapsed) for label in renditions}
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import requests
+
+from .events import EventEmitter
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+
+class FakeSession:
+    """
+    Records posted batches; answers with the queued status codes (200 once
+    they run out) or raises ConnectionError for None.
+    """
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.batches = []
+        self.posted = threading.Event()
+
+    def post(self, url, json, timeout):
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status is None:
+            raise requests.ConnectionError("monitoring-service unreachable")
+        self.batches.append(json)
+        self.posted.set()
+        return FakeResponse(status)
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    session = FakeSession()
+    emitter = EventEmitter("http://monitoring/events", max_batch=3, flush_seconds=60, session=session)
+    for i in range(3):
+        emitter.emit("start", f"video{i}")
+    assert session.posted.wait(5)
+    assert [[e["video_id"] for e in batch] for batch in session.batches] == [["video0", "video1", "video2"]]
+    assert all(e["type"] == "start" and e["at"] for e in session.batches[0])
+    emitter.close()
+
+
+def test_partial_batch_is_sent_after_the_window():
+    session = FakeSession()
+    emitter = EventEmitter("http://monitoring/events", max_batch=50, flush_seconds=0.05, session=session)
+    start = time.monotonic()
+    emitter.emit("end", "video0", transcription_id="t1", resolutions={"720p": "f720"})
+    assert session.posted.wait(5)
+    assert time.monotonic() - start < 5
+    assert session.batches == [[{
+        "type": "end", "video_id": "video0", "at": session.batches[0][0]["at"],
+        "transcription_id": "t1", "resolutions": {"720p": "f720"},
+    }]]
+    emitter.close()
+
+
+def test_failed_batches_are_retried_in_order_and_client_errors_dropped():
+    session = FakeSession(statuses=[None, 503, 200, 422])
+    emitter = EventEmitter("http://monitoring/events", max_batch=2, flush_seconds=60, session=session)
+    emitter._thread = threading.current_thread()  # no background thread: flush by hand
+    emitter.emit("start", "a")
+    emitter.emit("end", "a")
+    assert emitter.flush() is False  # connection error
+    assert emitter.flush() is False  # 503
+    emitter.emit("start", "b")
+    assert emitter.flush() is True  # [a, a] then [b] (rejected with 422)
+    assert [[e["video_id"] for e in batch] for batch in session.batches] == [["a", "a"], ["a", "a"], ["b"]]
+    assert (emitter.sent, emitter.dropped) == (2, 1)
+
+
+def test_buffer_keeps_the_newest_events_when_full():
+    session = FakeSession(statuses=[None])
+    emitter = EventEmitter("http://monitoring/events", max_batch=2, max_buffer=3, session=session)
+    emitter._thread = threading.current_thread()
+    for i in range(5):
+        emitter.emit("start", f"video{i}")
+    assert emitter.flush() is False
+    assert emitter.dropped == 2
+    assert emitter.flush() is True
+    assert [e["video_id"] for batch in session.batches for e in batch] == ["video2", "video3", "video4"]
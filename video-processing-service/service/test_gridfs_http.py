@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI, Request
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from .gridfs_http import gridfs_response, parse_range
+
+CHUNK_SIZE = 1000
+DATA = bytes(range(256)) * 14  # 3584 bytes: three full GridFS chunks and a partial one
+
+
+def serve(requests):
+    """
+    Upload DATA (as video/mp4) and a text file through motor to an in-memory
+    Mongo, then send each (file, headers) request to a /download app.
+    `headers` may be a function of the file ids.
+    """
+    async def run():
+        with mongomock_motor.enabled_gridfs_integration():
+            bucket = AsyncIOMotorGridFSBucket(mongomock_motor.AsyncMongoMockClient().db, chunk_size_bytes=CHUNK_SIZE)
+            ids = {
+                "video": str(await bucket.upload_from_stream(
+                    "clip.mp4", DATA, metadata={"content_type": "video/mp4"})),
+                "text": str(await bucket.upload_from_stream("clip.txt", b"hello")),
+                "missing": str(ObjectId()),
+                "invalid": "not-an-id",
+            }
+
+            app = FastAPI()
+
+            @app.get("/download/{file_id}")
+            async def download(file_id: str, request: Request):
+                return await gridfs_response(bucket, file_id, request.headers)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [
+                    await client.get(f"/download/{ids[name]}", headers=headers(ids) if callable(headers) else headers)
+                    for name, headers in requests
+                ]
+
+    return asyncio.run(run())
+
+
+def test_full_download_has_length_type_and_etag():
+    (response,) = serve([("video", {})])
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["content-length"] == str(len(DATA))
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"]
+
+
+def test_byte_ranges():
+    ranges = ["bytes=0-0", "bytes=1500-2499", "bytes=999-1000", "bytes=3000-", "bytes=-100", "bytes=3500-99999"]
+    responses = serve([("video", {"Range": r}) for r in ranges])
+    expected = [(0, 0), (1500, 2499), (999, 1000), (3000, 3583), (3484, 3583), (3500, 3583)]
+
+    for response, (start, end) in zip(responses, expected):
+        assert response.status_code == 206
+        assert response.content == DATA[start:end + 1]
+        assert response.headers["content-length"] == str(end - start + 1)
+        assert response.headers["content-range"] == f"bytes {start}-{end}/{len(DATA)}"
+
+
+def test_unsatisfiable_range():
+    (response,) = serve([("video", {"Range": "bytes=5000-6000"})])
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_conditional_get():
+    first, cached, other, stale_range = serve([
+        ("video", {}),
+        ("video", lambda ids: {"If-None-Match": f'"{ids["video"]}"'}),
+        ("video", {"If-None-Match": '"something-else"'}),
+        ("video", {"Range": "bytes=0-9", "If-Range": '"something-else"'}),
+    ])
+    assert cached.headers["etag"] == first.headers["etag"]
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert other.status_code == 200
+    assert stale_range.status_code == 200
+    assert stale_range.content == DATA
+
+
+def test_content_type_from_filename_and_errors():
+    text, missing, invalid = serve([("text", {}), ("missing", {}), ("invalid", {})])
+    assert text.headers["content-type"].startswith("text/plain")
+    assert text.content == b"hello"
+    assert missing.status_code == 404
+    assert invalid.status_code == 400
+
+
+def test_parse_range_ignores_multi_and_malformed_ranges():
+    assert parse_range("bytes=0-1,5-6", 10) is None
+    assert parse_range("items=0-1", 10) is None
+    assert parse_range("bytes=-", 10) is None
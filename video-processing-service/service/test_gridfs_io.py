@@ -0,0 +1,47 @@
+import asyncio
+import os
+import tracemalloc
+
+from bson import ObjectId
+
+from .gridfs_io import download_to_file
+
+CHUNK_SIZE = 255 * 1024
+FILE_SIZE = 200 * 1024 * 1024
+MEMORY_CEILING = 8 * 1024 * 1024
+
+
+class FakeGridOut:
+    """Yields FILE_SIZE bytes in GridFS-sized chunks, generated on the fly."""
+
+    def __init__(self, size: int):
+        self.remaining = size
+
+    async def readchunk(self) -> bytes:
+        n = min(CHUNK_SIZE, self.remaining)
+        self.remaining -= n
+        return bytes(n)
+
+
+class FakeBucket:
+    def __init__(self, size: int):
+        self.size = size
+
+    async def open_download_stream(self, file_id):
+        assert isinstance(file_id, ObjectId)
+        return FakeGridOut(self.size)
+
+
+def test_download_to_file_bounded_memory():
+    tracemalloc.start()
+    try:
+        path = asyncio.run(download_to_file(FakeBucket(FILE_SIZE), str(ObjectId())))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    try:
+        assert os.path.getsize(path) == FILE_SIZE
+        assert peak < MEMORY_CEILING
+    finally:
+        os.remove(path)
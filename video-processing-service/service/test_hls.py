@@ -0,0 +1,47 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from .config import Rendition
+from .hls import MASTER_PLAYLIST, build_hls_args, encode_hls, hls_files
+
+RESOLUTIONS = {
+    "720p": Rendition(height=720, preset="ultrafast", crf=28, maxrate="2M"),
+    "480p": Rendition(height=480, preset="ultrafast", crf=30),
+}
+
+
+def stream_map(args):
+    return args[args.index("-var_stream_map") + 1]
+
+
+def test_hls_args_map_every_resolution():
+    assert stream_map(build_hls_args("in.mp4", RESOLUTIONS, "out", 4)) == "v:0,a:0,name:720p v:1,a:1,name:480p"
+
+    video_only = build_hls_args("in.mp4", RESOLUTIONS, "out", 4, audio=False)
+    assert stream_map(video_only) == "v:0,name:720p v:1,name:480p"
+    assert "0:a:0" not in video_only
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_encode_hls_writes_master_and_segments(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=duration=5:size=320x240:rate=25",
+        "-f", "lavfi", "-i", "sine=duration=5",
+        "-c:v", "libx264", "-c:a", "aac", "-shortest", "clip.mp4",
+    ], check=True)
+
+    results = encode_hls("clip.mp4", "clip.mp4", RESOLUTIONS, segment_seconds=2)
+
+    assert all(r.ok for r in results.values())
+    paths = [rel for _, rel in hls_files("clip_hls")]
+    assert MASTER_PLAYLIST in paths
+    with open(os.path.join("clip_hls", MASTER_PLAYLIST)) as f:
+        master = f.read()
+    for label in RESOLUTIONS:
+        assert f"{label}/index.m3u8" in master
+        assert len([p for p in paths if p.startswith(f"{label}/seg_")]) >= 2
@@ -0,0 +1,88 @@
+import time
+
+import fakeredis
+
+from .job_queue import JobQueue
+
+STREAM, GROUP = "video_uploads", "video-processing"
+
+
+def queues(*consumers, claim_idle_ms=50, max_deliveries=3):
+    """
+    One JobQueue per consumer name (one per replica), on a shared fake Redis.
+    """
+    client = fakeredis.FakeRedis()
+    result = [
+        JobQueue(client, STREAM, GROUP, consumer=name, claim_idle_ms=claim_idle_ms, max_deliveries=max_deliveries)
+        for name in consumers
+    ]
+    result[0].ensure_group()
+    result[0].ensure_group()  # BUSYGROUP is ignored
+    return client, result
+
+
+def add_job(client, video_id):
+    return client.xadd(STREAM, {"file_name": f"alice_{video_id}.mp4", "video_id": video_id}).decode()
+
+
+def test_read_then_ack_clears_the_job():
+    client, (q,) = queues("a")
+    msg_id = add_job(client, "v1")
+
+    jobs = q.read(10, block_ms=10)
+    assert jobs == [(msg_id, {"file_name": "alice_v1.mp4", "video_id": "v1"})]
+    assert q.read(10, block_ms=10) == []  # delivered once per group
+    assert q.delivery_count(msg_id) == 1
+
+    q.ack(msg_id)
+    assert client.xpending(STREAM, GROUP)["pending"] == 0
+    assert q.reclaim(10) == []
+
+
+def test_crashed_consumers_job_is_reclaimed_after_idle():
+    client, (crashed, alive) = queues("crashed", "alive")
+    msg_id = add_job(client, "v1")
+    assert [m for m, _ in crashed.read(10, block_ms=10)] == [msg_id]
+
+    assert alive.reclaim(10) == []  # not idle long enough yet
+    time.sleep(0.1)
+    assert [m for m, _ in alive.reclaim(10)] == [msg_id]
+    assert client.xpending_range(STREAM, GROUP, "-", "+", 10)[0]["consumer"] == b"alive"
+
+
+def test_heartbeat_keeps_a_running_job_from_being_reclaimed():
+    client, (worker, other) = queues("worker", "other", claim_idle_ms=150)
+    msg_id = add_job(client, "v1")
+    worker.read(10, block_ms=10)
+
+    for _ in range(3):
+        time.sleep(0.08)
+        worker.heartbeat([msg_id])
+    assert other.reclaim(10) == []
+    assert worker.delivery_count(msg_id) == 1  # heartbeats are not redeliveries
+
+
+def test_job_is_dead_lettered_after_max_deliveries():
+    client, (q,) = queues("a", claim_idle_ms=0, max_deliveries=2)
+    msg_id = add_job(client, "v1")
+    q.read(10, block_ms=10)  # delivery 1
+    assert [m for m, _ in q.reclaim(10)] == [msg_id]  # delivery 2
+
+    q._claim_cursor = "0-0"
+    assert q.reclaim(10) == []  # delivery 3 > max_deliveries
+    assert client.xpending(STREAM, GROUP)["pending"] == 0
+    dead = client.xrange(q.dead_letter_stream)
+    assert [fields[b"video_id"] for _, fields in dead] == [b"v1"]
+
+
+def test_trim_removes_only_acked_entries():
+    client, (q,) = queues("a")
+    ids = [add_job(client, f"v{i}") for i in range(5)]
+    q.read(3, block_ms=10)  # v0..v2 delivered, v3 and v4 not yet read
+    q.ack(ids[0])
+    q.ack(ids[2])  # v1 still pending
+
+    assert q.trim() == 1
+    # v0 is gone; pending v1 (and everything after it) is kept
+    assert [m.decode() for m, _ in client.xrange(STREAM)] == ids[1:]
+    assert [m for m, _ in q.read(10, block_ms=10)] == ids[3:]
@@ -0,0 +1,41 @@
+from .config import Rendition
+from .encoder import build_single_pass_args
+from .ladder import codec_args, plan_ladder
+
+LADDER = {
+    "1080p": Rendition(height=1080, crf=22, maxrate="5M"),
+    "720p": Rendition(height=720, preset="medium"),
+    "480p": Rendition(height=480, crf=26),
+}
+
+
+def test_plan_skips_upscales_and_fills_defaults():
+    plan, skipped = plan_ladder(LADDER, 720, "veryfast", 30)
+
+    assert skipped == ["1080p"]
+    assert plan["720p"].preset == "medium" and plan["720p"].crf == 30
+    assert plan["480p"].preset == "veryfast" and plan["480p"].crf == 26
+
+
+def test_plan_keeps_smallest_rung_at_source_height():
+    plan, skipped = plan_ladder(LADDER, 361, "veryfast", 30)
+
+    assert list(plan) == ["480p"]
+    assert plan["480p"].height == 360
+    assert sorted(skipped) == ["1080p", "720p"]
+
+
+def test_plan_without_probe_encodes_everything():
+    plan, skipped = plan_ladder(LADDER, None, "veryfast", 30)
+    assert list(plan) == list(LADDER) and skipped == []
+
+
+def test_args_preserve_aspect_and_cap_bitrate():
+    plan, _ = plan_ladder(LADDER, None, "veryfast", 30)
+    args = build_single_pass_args("in.mp4", {label: (r, f"{label}.mp4") for label, r in plan.items()})
+
+    assert "scale=-2:1080" in args[args.index("-filter_complex") + 1]
+    assert codec_args(plan["1080p"]) == [
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "22", "-maxrate", "5M", "-bufsize", "10M",
+    ]
+    assert "-maxrate" not in codec_args(plan["480p"])
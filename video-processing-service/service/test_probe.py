@@ -0,0 +1,38 @@
+from .probe import parse_probe
+
+
+def test_parse_rotated_video_with_audio():
+    media = parse_probe({
+        "format": {"duration": "12.480000", "size": "5242880", "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+                   "bit_rate": "3360000"},
+        "streams": [
+            {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+             "avg_frame_rate": "30000/1001", "pix_fmt": "yuv420p",
+             "side_data_list": [{"rotation": -90}]},
+            {"codec_type": "audio", "codec_name": "aac", "channels": 2, "sample_rate": "48000"},
+        ],
+    })
+
+    assert media["duration"] == 12.48
+    assert media["size"] == 5242880
+    assert media["has_audio"] and media["has_video"]
+    assert media["video"] == {"codec": "h264", "width": 1080, "height": 1920, "fps": 29.97,
+                              "pix_fmt": "yuv420p", "rotation": -90}
+    assert media["audio"] == {"codec": "aac", "channels": 2, "sample_rate": 48000}
+
+
+def test_parse_silent_video_ignores_cover_art():
+    media = parse_probe({
+        "format": {"format_name": "matroska,webm"},
+        "streams": [
+            {"codec_type": "video", "codec_name": "mjpeg", "width": 300, "height": 300,
+             "disposition": {"attached_pic": 1}},
+            {"codec_type": "video", "codec_name": "vp9", "width": 640, "height": 360,
+             "avg_frame_rate": "25/1", "duration": "3.5", "tags": {"rotate": "0"}},
+        ],
+    })
+
+    assert media["duration"] == 3.5
+    assert media["has_audio"] is False and media["audio"] is None
+    assert media["video"]["codec"] == "vp9"
+    assert (media["video"]["width"], media["video"]["height"]) == (640, 360)
@@ -0,0 +1,84 @@
+import pytest
+
+from .scheduler import DEFAULT_COST, Scheduler, ScheduledJob, estimate_cost
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def job(name, cost, user=""):
+    return ScheduledJob(name, {}, cost, user)
+
+
+def drain(scheduler):
+    order = []
+    while len(scheduler):
+        order.append(scheduler.pop().msg_id)
+    return order
+
+
+def test_estimate_cost_weights_duration_by_frame_area():
+    assert estimate_cost(None) == DEFAULT_COST
+    assert estimate_cost({"duration": 30, "video": {"width": 1280, "height": 720}}) == 30
+    assert estimate_cost({"duration": 30, "video": {"width": 1920, "height": 1080}}) == pytest.approx(67.5)
+
+
+def test_fifo_keeps_arrival_order():
+    scheduler = Scheduler("fifo")
+    for name, cost in [("a", 100), ("b", 1), ("c", 10)]:
+        scheduler.push(job(name, cost))
+    assert drain(scheduler) == ["a", "b", "c"]
+
+
+def test_sjf_runs_short_jobs_first():
+    scheduler = Scheduler("sjf", clock=Clock())
+    for name, cost in [("long", 7200), ("short", 30), ("medium", 300)]:
+        scheduler.push(job(name, cost))
+    assert drain(scheduler) == ["short", "medium", "long"]
+
+
+def test_sjf_aging_lets_long_jobs_through():
+    clock = Clock()
+    scheduler = Scheduler("sjf", aging=1.0, clock=clock)
+    scheduler.push(job("long", 600))
+
+    clock.now = 500
+    scheduler.push(job("short", 30))
+    assert scheduler.pop().msg_id == "short"  # 600 - 500 waited > 30
+
+    clock.now = 1000
+    scheduler.push(job("late-short", 30))
+    assert scheduler.pop().msg_id == "long"  # 600 - 1000 waited < 30
+
+
+def test_wfq_shares_workers_across_users():
+    scheduler = Scheduler("wfq", clock=Clock())
+    for i in range(5):
+        scheduler.push(job(f"heavy{i}", 100, user="heavy"))
+    scheduler.push(job("light0", 100, user="light"))
+    scheduler.push(job("light1", 100, user="light"))
+
+    order = drain(scheduler)
+    # The light user's jobs interleave with the heavy user's backlog
+    assert order.index("light0") <= 1
+    assert order.index("light1") <= 3
+    assert [n for n in order if n.startswith("heavy")] == [f"heavy{i}" for i in range(5)]
+
+
+def test_wfq_weights():
+    scheduler = Scheduler("wfq", weights={"paid": 3.0}, clock=Clock())
+    for i in range(6):
+        scheduler.push(job(f"free{i}", 10, user="free"))
+        scheduler.push(job(f"paid{i}", 10, user="paid"))
+    first = drain(scheduler)[:8]
+    assert sum(n.startswith("paid") for n in first) == 6
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        Scheduler("lifo")
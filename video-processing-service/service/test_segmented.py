@@ -0,0 +1,48 @@
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from .config import Rendition
+from .encoder import encode_single_pass
+from .segmented import encode_segmented
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+RENDITIONS = {
+    "360p": Rendition(height=360, preset="ultrafast", crf=28),
+    "240p": Rendition(height=240, preset="ultrafast", crf=30),
+}
+
+
+def decoded(path):
+    """
+    (frame count, duration in seconds) of a file's video stream, by decoding it.
+    """
+    stderr = subprocess.run(
+        ["ffmpeg", "-i", path, "-map", "0:v", "-f", "null", "-"], capture_output=True, text=True
+    ).stderr
+    frames = int(re.findall(r"frame=\s*(\d+)", stderr)[-1])
+    h, m, s = re.search(r"Duration: (\d+):(\d+):([\d.]+)", stderr).groups()
+    return frames, int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def test_segmented_matches_single_pass(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=duration=12:size=640x360:rate=25",
+        "-f", "lavfi", "-i", "sine=duration=12",
+        "-c:v", "libx264", "-g", "50", "-c:a", "aac", "-shortest", "clip.mp4",
+    ], check=True)
+
+    segmented = encode_segmented("segmented.mp4", "clip.mp4", RENDITIONS, segment_seconds=3, workers=3)
+    single = encode_single_pass("single.mp4", "clip.mp4", RENDITIONS)
+
+    for label in RENDITIONS:
+        assert segmented[label].ok and single[label].ok
+        seg_frames, seg_duration = decoded(segmented[label].path)
+        frames, duration = decoded(single[label].path)
+        assert seg_frames == frames == 300
+        assert seg_duration == pytest.approx(duration, abs=0.05)
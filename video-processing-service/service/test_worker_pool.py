@@ -0,0 +1,33 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from .worker_pool import WorkerPool
+
+
+def crash():
+    os._exit(1)  # as an OOM-killed worker would
+
+
+def square(x):
+    return x * x
+
+
+def test_a_dead_worker_fails_its_jobs_and_the_pool_recovers():
+    pool = WorkerPool(max_workers=1, max_queue=2)
+    try:
+        crashed = pool.submit(crash)
+        queued = pool.submit(square, 3)
+        with pytest.raises(BrokenProcessPool):
+            crashed.result(timeout=60)
+        with pytest.raises(BrokenProcessPool):
+            queued.result(timeout=60)  # lost with the broken executor; the caller retries it
+
+        assert pool.submit(square, 4).result(timeout=60) == 16
+        assert pool.submit(square, 5).result(timeout=60) == 25
+    finally:
+        pool.shutdown()  # waits for the done callbacks too
+    stats = pool.stats()
+    assert (stats["jobs_failed"], stats["jobs_completed"], stats["pool_restarts"]) == (2, 2, 1)
+    assert pool.free_slots() == 3
@@ -0,0 +1,40 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimings:
+    """
+    Start/end offsets (seconds since the job started) of each pipeline stage.
+    Stages may run concurrently from different threads; comparing their
+    start/end offsets shows how much they overlapped.
+    """
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter() - self._t0
+        try:
+            yield
+        finally:
+            end = time.perf_counter() - self._t0
+            with self._lock:
+                self.stages[name] = {"start": round(start, 3), "end": round(end, 3), "seconds": round(end - start, 3)}
+
+    def timed(self, name: str, fn, *args):
+        """
+        Call fn(*args) inside stage(name) and return its result.
+        """
+        with self.stage(name):
+            return fn(*args)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return dict(self.stages)
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}={t['seconds']:.1f}s" for name, t in self.to_dict().items())
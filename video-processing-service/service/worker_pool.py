@@ -0,0 +1,154 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may run on (respects affinity / cpusets where supported).
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def workers_for(max_workers: int, workers_per_cpu: float) -> int:
+    """
+    Resolve the pool size: an explicit max_workers wins, otherwise scale with
+    the number of available CPUs. Always at least one worker.
+    """
+    if max_workers > 0:
+        return max_workers
+    return max(1, int(available_cpus() * workers_per_cpu))
+
+
+def queue_for(max_queue: int, queue_per_worker: int, workers: int) -> int:
+    """
+    Resolve the queue bound: an explicit max_queue wins, otherwise it scales
+    with the pool size.
+    """
+    if max_queue > 0:
+        return max_queue
+    return queue_per_worker * workers
+
+
+class PoolFull(Exception):
+    """Raised by WorkerPool.submit when the queue is full and block=False."""
+
+
+class WorkerPool:
+    """
+    Fixed-size process pool with a bounded queue.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more wait
+    for a free worker. When both are used up, submit() blocks (or raises
+    PoolFull), which pushes back on whoever is feeding the pool.
+
+    A worker process that dies (e.g. OOM-killed) breaks a ProcessPoolExecutor
+    for good: its jobs fail with BrokenProcessPool. The pool then replaces the
+    executor, so later jobs run on fresh workers; the failed ones are up to
+    the caller to retry.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = self._new_executor()
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._restarts = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # "spawn" so workers don't inherit the parent's Mongo/Redis sockets and threads
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """
+        Replace `broken` with a new executor, unless that already happened.
+        """
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+            self._restarts += 1
+        print(f"[WorkerPool] A worker process died, restarted the pool ({self._restarts} restarts)")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args, block: bool = True, timeout: float | None = None) -> Future:
+        """
+        Queue fn(*args) on the pool. Blocks while the pool and queue are full.
+        """
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            raise PoolFull(f"{self.max_workers} workers busy and {self.max_queue} jobs queued")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            executor = self._executor
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # Broke before the done callback of the job that broke it ran
+                self._restart(executor)
+                executor = self._executor
+                future = executor.submit(fn, *args)
+        except Exception:
+            self._release(failed=True)
+            raise
+        future.add_done_callback(lambda f: self._done(executor, f))
+        return future
+
+    def _done(self, executor: ProcessPoolExecutor, future: Future):
+        error = None if future.cancelled() else future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._restart(executor)
+        self._release(failed=future.cancelled() or error is not None)
+
+    def _release(self, failed: bool):
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+        self._slots.release()
+
+    def free_slots(self) -> int:
+        """
+        Jobs that can be submitted right now without blocking.
+        """
+        with self._lock:
+            return self.max_workers + self.max_queue - self._in_flight
+
+    def idle_workers(self) -> int:
+        """
+        Workers with nothing to run, i.e. a job submitted now starts at once.
+        """
+        with self._lock:
+            return max(0, self.max_workers - self._in_flight)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of pool load. The executor runs jobs in submission order on
+        max_workers processes, so anything beyond that is waiting in the queue.
+        """
+        with self._lock:
+            in_flight = self._in_flight
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active_workers": min(in_flight, self.max_workers),
+                "queue_depth": max(0, in_flight - self.max_workers),
+                "jobs_completed": self._completed,
+                "jobs_failed": self._failed,
+                "pool_restarts": self._restarts,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 import os
 import logging
 import httpx
@@ -12,6 +13,12 @@ db = None
 grid_fs_bucket = None
 metadata_collection = None
 
+MONITORING_URL = os.getenv("MONITORING_URL", "http://monitoring-service")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload stream exceeds the allowed size."""
+
 async def init_mongo():
     """
     Initialize MongoDB connection, create the GridFS bucket,
@@ -34,72 +41,146 @@ async def init_mongo():
     indexes = [
         IndexModel([("user_id", ASCENDING)]),
         IndexModel([("type", ASCENDING)]),
+        IndexModel([("sha256", ASCENDING), ("processed", ASCENDING)]),
+        IndexModel([("video_id", ASCENDING)]),
+        # Media metadata probed by the processing service (see its media_for)
+        IndexModel([("media.duration", ASCENDING)]),
+        IndexModel([("media.has_audio", ASCENDING)]),
+        IndexModel([("media.video.height", ASCENDING)]),
     ]
     await metadata_collection.create_indexes(indexes)
     
     logging.info("MongoDB initialized, GridFS bucket created, indexes set.")
 
 
-async def upload_video_to_db(filename, content, content_type, user_id):
+async def find_processed_duplicate(sha256):
+    """
+    Find an already processed original with the same content hash, or None.
+    """
+    return await metadata_collection.find_one(
+        {"sha256": sha256, "type": "original", "processed": True}
+    )
+
+
+async def notify_monitoring(path, payload=None, params=None):
     """
-    Upload a video to GridFS, store metadata, and then attempt to
-    notify the Monitoring Service in a try block. If notification fails,
-    the function just logs the error and continues.
+    POST to the Monitoring Service. If the call fails, the error is logged
+    and the upload carries on.
     """
-    # 1. Upload video to GridFS
-    video_id = await grid_fs_bucket.upload_from_stream(
+    try:
+        async with httpx.AsyncClient() as client_http:
+            response = await client_http.post(f"{MONITORING_URL}{path}", json=payload, params=params)
+            response.raise_for_status()
+            logging.info("Successfully posted to monitoring-service %s", path)
+    except Exception:
+        # If the call fails, log the exception and keep going
+        logging.exception("Failed to send %s to monitoring service", path)
+
+
+async def upload_video_to_db(filename, chunks, content_type, user_id, max_size):
+    """
+    Stream a video into GridFS chunk by chunk while hashing it (SHA-256),
+    store metadata, and then notify the Monitoring Service.
+
+    `chunks` is an async iterable of bytes. If more than `max_size` bytes
+    arrive, the partial GridFS file is aborted and UploadTooLarge is raised.
+
+    If an original with the same hash has already been processed, the new
+    GridFS file is discarded and its renditions/transcript are reused: the
+    metadata points at them and the monitoring record is marked done straight
+    away. Returns (video_id, duplicate_of): duplicate_of is the ID of the
+    upload whose GridFS file holds the raw video, or None if it is this one.
+    """
+    # 1. Stream video into GridFS, hashing and enforcing the size limit as bytes arrive
+    grid_in = grid_fs_bucket.open_upload_stream(
         filename,
-        content,
         metadata={"content_type": content_type, "type": "original"}
     )
-    
-    # 2. Insert document into metadata collection
-    str_video_id = str(video_id)
-    await metadata_collection.insert_one({
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+            digest.update(chunk)
+            await grid_in.write(chunk)
+    except BaseException:
+        await grid_in.abort()
+        raise
+    sha256 = digest.hexdigest()
+    str_video_id = str(grid_in._id)
+
+    # 2. Same content already processed? Drop our copy and reuse its outputs.
+    duplicate = await find_processed_duplicate(sha256)
+    duplicate_of = None
+    if duplicate:
+        await grid_in.abort()
+        # The match may itself be a duplicate; point at the upload that kept its file
+        duplicate_of = duplicate.get("duplicate_of") or duplicate["video_id"]
+    else:
+        await grid_in.close()
+
+    # 3. Insert document into metadata collection
+    document = {
         "video_id": str_video_id,
         "filename": filename,
         "content_type": content_type,
         "user_id": user_id,
         "type": "original",
-    })
+        "sha256": sha256,
+        "size": size,
+        "processed": False,
+    }
+    if duplicate:
+        document.update({
+            "processed": True,
+            "duplicate_of": duplicate_of,
+            "resolutions": duplicate.get("resolutions", {}),
+            "transcript_file_id": duplicate.get("transcript_file_id", ""),
+            "hls_playlist": duplicate.get("hls_playlist", ""),
+        })
+        if duplicate.get("media"):
+            document["media"] = duplicate["media"]
+    await metadata_collection.insert_one(document)
 
-    # 3. Attempt to notify the Monitoring Service in a try block
-    try:
-        async with httpx.AsyncClient() as client_http:
-            # Example payload matching your VideoCreate schema
-            payload = {
-                "user_id": user_id,
-                "raw_video_id": str_video_id,
-                "processed_video_id": None,
-                "transcription_id": None,
-                "status": "created",
-                "video_processing_status": "pending",
-                "audio_processing_status": "pending",
-                "video_processing_start": None,
-                "video_processing_end": None,
-                "audio_processing_start": None,
-                "audio_processing_end": None,
-                "upload_time": datetime.utcnow().isoformat(),
-                "processed_time": None,
-                "total_processing_time": None,
-                "additonal_details": {
-                    "filename": filename,
-                    "content_type": content_type,
-                },
-            }
-
-            # Adjust this URL if needed (e.g., 'http://monitoring-service/videos')
-            monitoring_service_url = "http://monitoring-service/videos"
-
-            response = await client_http.post(monitoring_service_url, json=payload)
-            response.raise_for_status()
-            logging.info("Successfully posted to monitoring-service for video_id=%s", str_video_id)
+    # 4. Notify the Monitoring Service
+    payload = {
+        "user_id": user_id,
+        "raw_video_id": str_video_id,
+        "processed_video_id": None,
+        "transcription_id": None,
+        "status": "created",
+        "video_processing_status": "pending",
+        "audio_processing_status": "pending",
+        "video_processing_start": None,
+        "video_processing_end": None,
+        "audio_processing_start": None,
+        "audio_processing_end": None,
+        "upload_time": datetime.utcnow().isoformat(),
+        "processed_time": None,
+        "total_processing_time": None,
+        "additonal_details": {
+            "filename": filename,
+            "content_type": content_type,
+            "duplicate_of": duplicate_of,
+        },
+    }
+    await notify_monitoring("/videos", payload)
 
-    except Exception:
-        # If the call fails, log the exception and keep going
-        logging.exception("Failed to send confirmation to monitoring service")
+    if duplicate:
+        # Record start + end so the user gets the "video_processed" event now
+        logging.info("Upload %s duplicates %s, reusing its outputs", str_video_id, duplicate_of)
+        await notify_monitoring(f"/video-processing-start/{str_video_id}", params={"user_id": user_id})
+        await notify_monitoring(f"/video-processing-end/{str_video_id}", {
+            "transcription_id": document["transcript_file_id"],
+            "resolutions": document["resolutions"],
+            "hls_playlist": document["hls_playlist"],
+            "video_processing_status": "done",
+            "status": "done",
+        })
 
-    return str_video_id
+    return str_video_id, duplicate_of
 
 
 async def find_videos_by_user(user_id):
@@ -1,10 +1,28 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import init_mongo, upload_video_to_db
+from .database import UploadTooLarge, init_mongo, upload_video_to_db
+from .streaming import MultipartFileReader
 import redis
 
-REDIS_CHANNEL = "video_uploads"
+REDIS_STREAM = "video_uploads"
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # 100 MB
+
+# The body is parsed by hand (see upload_video), so describe it for Swagger UI
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
 
 app = FastAPI()
 
@@ -30,21 +48,44 @@ async def startup_event():
 # -------------------------------------------------------------------------
 # Video upload endpoint
 # -------------------------------------------------------------------------
-@app.post("/upload-video/")
-async def upload_video(user_id: str, file: UploadFile = File(...)):
-    print(f"{user_id} uploading {file.filename}")
+@app.post("/upload-video/", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_video(user_id: str, request: Request):
+    # Reject obviously oversized bodies before reading anything
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE + 64 * 1024:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    # Stream the multipart "file" field straight into GridFS
+    try:
+        reader = MultipartFileReader(request, "file")
+        await reader.start()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    tagged_filename = f"{user_id}_{file.filename}"
-    contents = await file.read()
+    print(f"{user_id} uploading {reader.filename}")
+    tagged_filename = f"{user_id}_{reader.filename}"
 
-    # Example size limit (100 MB)
-    if len(contents) > 100 * 1024 * 1024:
+    print(f"Uploading {reader.filename} to DB")
+    try:
+        video_id, duplicate_of = await upload_video_to_db(
+            tagged_filename, reader.chunks(), reader.content_type, user_id, MAX_UPLOAD_SIZE
+        )
+    except UploadTooLarge:
         raise HTTPException(status_code=413, detail="File too large")
 
-    print(f"Uploading {file.filename} to DB")
-    video_id = await upload_video_to_db(tagged_filename, contents, file.content_type, user_id)
+    if duplicate_of:
+        # Same content was processed before; its renditions were reused, nothing to process.
+        # This upload's own GridFS file was dropped: the raw video is duplicate_of's.
+        print(f"{tagged_filename} is a duplicate of {duplicate_of}, skipping processing")
+        return {"filename": reader.filename, "video_id": video_id, "deduplicated": True,
+                "duplicate_of": duplicate_of}
 
-    print(f"Publishing {tagged_filename},{video_id} to Redis channel")
-    redis_channel.publish(REDIS_CHANNEL, f"{tagged_filename},{video_id}")
+    # Durable hand-off: the job stays in the stream until a processing replica
+    # acks it. No MAXLEN: the processing service trims acked entries itself.
+    print(f"Adding {tagged_filename},{video_id} to Redis stream")
+    redis_channel.xadd(
+        REDIS_STREAM,
+        {"file_name": tagged_filename, "video_id": video_id, "user_id": user_id},
+    )
 
-    return {"filename": file.filename, "video_id": video_id}
+    return {"filename": reader.filename, "video_id": video_id, "deduplicated": False, "duplicate_of": None}
@@ -0,0 +1,124 @@
+from typing import AsyncIterator, List, Optional
+
+from fastapi import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # older python-multipart releases
+    import multipart
+    from multipart.multipart import parse_options_header
+
+
+class MultipartFileReader:
+    """
+    Incrementally parse a multipart/form-data request body and expose one file
+    field as an async stream of byte chunks, without buffering the whole body.
+
+    Usage:
+        reader = MultipartFileReader(request, "file")
+        await reader.start()          # parses up to the file part's headers
+        reader.filename, reader.content_type
+        async for chunk in reader.chunks():
+            ...
+    """
+
+    def __init__(self, request: Request, field_name: str = "file"):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+        _, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Missing multipart boundary")
+
+        self._body = request.stream().__aiter__()
+        self._body_done = False
+        self._pending: List[bytes] = []
+        self._in_field = False
+        self._field_found = False
+        self._field_done = False
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+
+        self._parser = multipart.MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    # -- parser callbacks ------------------------------------------------------
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        self._in_field = name == self.field_name and not self._field_found
+        if self._in_field:
+            self._field_found = True
+            self.filename = options.get(b"filename", b"").decode("utf-8") or None
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_field:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._in_field:
+            self._in_field = False
+            self._field_done = True
+
+    # -- public API ------------------------------------------------------------
+    async def _feed(self) -> bool:
+        """
+        Feed the next body chunk to the parser. Returns False once the body is exhausted.
+        """
+        if self._body_done:
+            return False
+        try:
+            data = await self._body.__anext__()
+        except StopAsyncIteration:
+            self._body_done = True
+            self._parser.finalize()
+            return False
+        self._parser.write(data)
+        return True
+
+    async def start(self):
+        """
+        Read the body until the headers of the file field have been parsed.
+        Raises ValueError if the field is not present.
+        """
+        while not self._field_found:
+            if not await self._feed():
+                raise ValueError(f"Missing form field '{self.field_name}'")
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """
+        Yield the file field's bytes as they arrive from the client.
+        """
+        while True:
+            while self._pending:
+                yield self._pending.pop(0)
+            if self._field_done or not await self._feed():
+                break
+        while self._pending:
+            yield self._pending.pop(0)
@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+
+import fakeredis
+import httpx
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from . import database, main
+
+BOUNDARY = "test-boundary-1234"
+VIDEO = bytes(range(256)) * 40  # 10240 bytes
+
+
+def multipart_body(fields):
+    """
+    A multipart/form-data body from (name, filename or None, bytes) fields.
+    """
+    body = b""
+    for name, filename, data in fields:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if filename:
+            body += b"Content-Type: video/mp4\r\n"
+        body += b"\r\n" + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def upload(monkeypatch, body, content_type=f"multipart/form-data; boundary={BOUNDARY}", max_size=None,
+           existing=(), monitoring_calls=None):
+    """
+    POST `body` to /upload-video/ in 1000-byte pieces (as a client streaming
+    it would) against in-memory Mongo/GridFS and Redis, with the `existing`
+    metadata documents already stored. Calls to the monitoring service are
+    appended to `monitoring_calls`. Returns the response,
+    the stored GridFS files and chunks, the metadata documents and the jobs
+    added to the stream.
+    """
+    async def run():
+        with mongomock_motor.enabled_gridfs_integration():
+            mongo = mongomock_motor.AsyncMongoMockClient().video_status
+            monkeypatch.setattr(database, "grid_fs_bucket", AsyncIOMotorGridFSBucket(mongo, chunk_size_bytes=4096))
+            monkeypatch.setattr(database, "metadata_collection", mongo.video_metadata)
+            for doc in existing:
+                await mongo.video_metadata.insert_one(dict(doc))
+            redis_client = fakeredis.FakeStrictRedis()
+            monkeypatch.setattr(main, "redis_channel", redis_client)
+            if max_size is not None:
+                monkeypatch.setattr(main, "MAX_UPLOAD_SIZE", max_size)
+
+            async def no_monitoring(path, payload=None, params=None):
+                if monitoring_calls is not None:
+                    monitoring_calls.append((path, payload, params))
+            monkeypatch.setattr(database, "notify_monitoring", no_monitoring)
+
+            async def pieces():
+                for i in range(0, len(body), 1000):
+                    yield body[i:i + 1000]
+
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                resp = await client.post("/upload-video/", params={"user_id": "alice"},
+                                         content=pieces(), headers={"content-type": content_type})
+            files = await mongo["fs.files"].find().to_list(None)
+            chunks = await mongo["fs.chunks"].find().sort("n").to_list(None)
+            docs = await mongo.video_metadata.find().to_list(None)
+            jobs = redis_client.xrange(main.REDIS_STREAM)
+            return resp, files, chunks, docs, jobs
+
+    return asyncio.run(run())
+
+
+def test_upload_is_streamed_into_gridfs_and_queued(monkeypatch):
+    body = multipart_body([("note", None, b"hello"), ("file", "clip.mp4", VIDEO)])
+    resp, files, chunks, docs, jobs = upload(monkeypatch, body)
+
+    assert resp.status_code == 200
+    video_id = resp.json()["video_id"]
+    assert resp.json()["deduplicated"] is False and resp.json()["duplicate_of"] is None
+    assert [str(f["_id"]) for f in files] == [video_id]
+    assert files[0]["filename"] == "alice_clip.mp4" and files[0]["length"] == len(VIDEO)
+    assert b"".join(c["data"] for c in chunks) == VIDEO
+    assert docs[0]["video_id"] == video_id and docs[0]["size"] == len(VIDEO)
+    assert docs[0]["content_type"] == "video/mp4"
+    assert [fields[b"video_id"].decode() for _, fields in jobs] == [video_id]
+    assert jobs[0][1][b"user_id"] == b"alice"
+
+
+@pytest.mark.parametrize("original", [
+    {"video_id": "65f1c0ffee0000000000000a"},
+    # a duplicate itself: its own GridFS file was dropped, so point past it
+    {"video_id": "65f1c0ffee0000000000000b", "duplicate_of": "65f1c0ffee0000000000000a"},
+])
+def test_duplicate_upload_points_at_the_stored_original(monkeypatch, original):
+    processed = {**original, "type": "original", "processed": True, "sha256": hashlib.sha256(VIDEO).hexdigest(),
+                 "resolutions": {"720p": "r720"}, "transcript_file_id": "t1", "hls_playlist": ""}
+    body = multipart_body([("file", "clip.mp4", VIDEO)])
+    calls = []
+    resp, files, chunks, docs, jobs = upload(monkeypatch, body, existing=[processed], monitoring_calls=calls)
+
+    assert resp.status_code == 200
+    assert resp.json()["deduplicated"] is True
+    assert resp.json()["duplicate_of"] == "65f1c0ffee0000000000000a"
+    assert files == [] and chunks == [] and jobs == []  # no second copy, nothing to process
+    doc = docs[-1]
+    assert doc["video_id"] == resp.json()["video_id"]
+    assert doc["duplicate_of"] == "65f1c0ffee0000000000000a"
+    assert doc["resolutions"] == {"720p": "r720"} and doc["processed"] is True
+    # the monitoring record is the uploader's, created and then marked done
+    video_id = resp.json()["video_id"]
+    assert [(path, params) for path, _, params in calls] == [
+        ("/videos", None),
+        (f"/video-processing-start/{video_id}", {"user_id": "alice"}),
+        (f"/video-processing-end/{video_id}", None),
+    ]
+    assert calls[0][1]["user_id"] == "alice" and calls[0][1]["raw_video_id"] == video_id
+
+
+def test_upload_over_the_limit_is_413_and_aborted(monkeypatch):
+    body = multipart_body([("file", "clip.mp4", VIDEO)])
+    resp, files, chunks, docs, jobs = upload(monkeypatch, body, max_size=5000)
+
+    assert resp.status_code == 413
+    assert files == [] and chunks == []  # partial GridFS file removed
+    assert docs == [] and jobs == []
+
+
+def test_missing_file_field_is_400(monkeypatch):
+    body = multipart_body([("video", "clip.mp4", VIDEO)])
+    resp, files, chunks, docs, jobs = upload(monkeypatch, body)
+
+    assert resp.status_code == 400
+    assert "file" in resp.json()["detail"]
+    assert files == [] and jobs == []
+
+
+def test_missing_boundary_is_400(monkeypatch):
+    body = multipart_body([("file", "clip.mp4", VIDEO)])
+    resp, files, chunks, docs, jobs = upload(monkeypatch, body, content_type="multipart/form-data")
+
+    assert resp.status_code == 400
+    assert "boundary" in resp.json()["detail"]
+    assert files == [] and jobs == []